@@ -10,4 +10,18 @@ FILL = 1
 STRETCH = 2
 
 VISIBLE = 1
-HIDDEN = 0
\ No newline at end of file
+HIDDEN = 0
+
+BROADCAST = "broadcast"
+
+TIMER_CLOCK = 0
+FRAME_CLOCK = 1
+
+PARTICLE_SPRITES = 0
+PARTICLE_PIXELS = 1
+
+SCREEN_RESIZED = "screen_resized"
+
+CAPTURE_PNG = 0
+CAPTURE_RAW = 1
+CAPTURE_HASH = 2
\ No newline at end of file
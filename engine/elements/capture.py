@@ -0,0 +1,163 @@
+import os
+import json
+import queue
+import hashlib
+import threading
+import pygame
+from engine.constants import CAPTURE_PNG, CAPTURE_RAW, CAPTURE_HASH
+
+FRAME = 0
+WIDTH = 1
+HEIGHT = 2
+PITCH = 3
+DATA = 4
+
+
+class FrameCapture:
+    """
+    Records the screen surface every frame.
+    The main thread only copies the raw pixel buffer into a bounded queue; a writer thread strips the
+    row padding, hashes the frame and encodes it. When the writer falls behind, frames are dropped
+    and counted rather than stalling the game.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine):
+        self.engine = engine
+
+        self.directory = None
+        self.mode = CAPTURE_PNG
+        self.queue = None
+        self.writer_thread = None
+
+        self.bytesize = 4
+        self.masks = (0, 0, 0, 0)
+
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+
+        self.hash_file = None
+        self.raw_file = None
+
+        self._recording = False
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def is_recording(self):
+        return self._recording
+
+    def get_captured_count(self):
+        return self.captured
+
+    def get_dropped_count(self):
+        return self.dropped
+
+    def get_written_count(self):
+        return self.written
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def start(self, directory, mode=CAPTURE_PNG, queue_size=16):
+        if self._recording:
+            raise RuntimeError("Already recording.")
+        if mode not in [CAPTURE_PNG, CAPTURE_RAW, CAPTURE_HASH]:
+            raise ValueError("Invalid capture mode.")
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.mode = mode
+        self.queue = queue.Queue(queue_size)
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+
+        surface = self.engine.screen.target
+        self.bytesize = surface.get_bytesize()
+        self.masks = surface.get_masks()
+
+        # frames.txt always gets a "frame width height sha256" line per frame, for pixel-exact comparisons
+        self.hash_file = open(os.path.join(directory, "frames.txt"), "w")
+        if mode == CAPTURE_RAW:
+            self.raw_file = open(os.path.join(directory, "frames.raw"), "wb")
+            with open(os.path.join(directory, "frames.json"), "w") as info:
+                json.dump({"bytesize": self.bytesize, "masks": self.masks, "framerate": self.engine.framerate}, info)
+
+        self._recording = True
+        self.writer_thread = threading.Thread(target=self.run)
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+
+    def stop(self):
+        if not self._recording:
+            return
+
+        self._recording = False
+        # Let the writer finish whatever is already queued
+        self.queue.put(None)
+        self.writer_thread.join()
+
+        self.hash_file.close()
+        self.hash_file = None
+        if self.raw_file is not None:
+            self.raw_file.close()
+            self.raw_file = None
+
+    def capture(self):
+        surface = self.engine.screen.target
+        self.captured += 1
+
+        if self.queue.full():
+            self.dropped += 1
+            return
+
+        # get_buffer().raw is a plain copy of the pixel memory, with no format conversion
+        width, height = surface.get_size()
+        frame = (self.engine.get_frame_count(), width, height, surface.get_pitch(), surface.get_buffer().raw)
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self):
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                return
+            self.write(frame)
+
+    def write(self, frame):
+        row_size = frame[WIDTH] * self.bytesize
+        data = frame[DATA]
+        if frame[PITCH] != row_size:
+            data = b"".join(data[y * frame[PITCH]:y * frame[PITCH] + row_size] for y in range(frame[HEIGHT]))
+
+        self.hash_file.write(f"{frame[FRAME]} {frame[WIDTH]} {frame[HEIGHT]} {hashlib.sha256(data).hexdigest()}\n")
+
+        if self.mode == CAPTURE_PNG:
+            image = pygame.Surface((frame[WIDTH], frame[HEIGHT]), 0, self.bytesize * 8, self.masks)
+            buffer = image.get_buffer()
+            if image.get_pitch() == row_size:
+                buffer.write(data, 0)
+            else:
+                for y in range(frame[HEIGHT]):
+                    buffer.write(data[y * row_size:(y + 1) * row_size], y * image.get_pitch())
+            del buffer
+            pygame.image.save(image, os.path.join(self.directory, f"frame_{frame[FRAME]:06}.png"))
+        elif self.mode == CAPTURE_RAW:
+            self.raw_file.write(data)
+
+        self.written += 1
@@ -1,3 +1,6 @@
+import inspect
+from engine.constants import CAPTURE_PNG, CAPTURE_RAW, CAPTURE_HASH
+
 FUNCTION = 0
 DESCRIPTION = 1
 TYPE = 2
@@ -27,6 +30,12 @@ class Commands:
         self.register("debug", self.debug, "Toggles debug mode.")
         self.register("clear", self.clear, "Clears the console.")
         self.register("reset", self.reset, "Resets the engine.")
+        self.register("press", self.press, "Holds down a key until released: press <key>.")
+        self.register("release", self.release, "Releases a key held down by press: release <key>.")
+        self.register("record", self.record, "Records the screen: record <directory> [png/raw/hash], or record stop.")
+        self.register("fx", self.fx, "Post-processing effects: fx lists them, fx <name> [on/off] toggles one.")
+        self.register("mem", self.mem, "Memory tracking: mem [on/off/top/gc/surfaces/reset].")
+        self.register("exec", self.exec_script, "Runs a command script: exec <file> [name=value ...], exec list, or exec stop.")
 
     #
     # ===============================================================
@@ -63,24 +72,38 @@ class Commands:
 
         self.commands[command.lower()] = (function, description, command_type)
 
-    def execute(self, string):
-        command = string.split(" ")[0].lower()
-        args = string.split(" ")[1:]
-
-        if command in self.commands:
-            try:
-                if self.commands[command][TYPE] == 3:
-                    self.commands[command][FUNCTION](self.console.send, args, self.engine)
-                elif self.commands[command][TYPE] == 2:
-                    self.commands[command][FUNCTION](self.console.send, args)
-                elif self.commands[command][TYPE] == 1:
-                    self.commands[command][FUNCTION](self.console.send)
-                else:
-                    self.commands[command][FUNCTION]()
-            except Exception as e:
-                self.console.send(f"Error while executing command: {e}")
+    def get_command(self, command):
+        return self.commands.get(command.lower())
+
+    def call(self, entry, args):
+        self.engine.metrics.commands.inc()
+
+        command_type = entry[TYPE]
+        if command_type == 3:
+            result = entry[FUNCTION](self.console.send, args, self.engine)
+        elif command_type == 2:
+            result = entry[FUNCTION](self.console.send, args)
+        elif command_type == 1:
+            result = entry[FUNCTION](self.console.send)
         else:
-            self.console.send(f"Unknown command: {command}")
+            result = entry[FUNCTION]()
+
+        # async def commands are handed to the engine's event loop
+        if inspect.iscoroutine(result):
+            self.engine.spawn_threadsafe(result)
+
+    def execute(self, string):
+        command, _, rest = string.partition(" ")
+        entry = self.commands.get(command.lower())
+
+        if entry is None:
+            self.console.send(f"Unknown command: {command.lower()}")
+            return
+
+        try:
+            self.call(entry, rest.split(" ") if rest else [])
+        except Exception as e:
+            self.console.send(f"Error while executing command: {e}")
 
     #
     # ===============================================================
@@ -143,4 +166,132 @@ class Commands:
 
     @staticmethod
     def reset(send, args, engine):
-        engine.reset()
\ No newline at end of file
+        engine.reset()
+
+    @staticmethod
+    def press(send, args, engine):
+        if len(args) != 1:
+            send("Usage: press <key>")
+            return
+        engine.inputs.press_key(args[0])
+
+    @staticmethod
+    def release(send, args, engine):
+        if len(args) != 1:
+            send("Usage: release <key>")
+            return
+        engine.inputs.release_key(args[0])
+
+    @staticmethod
+    def record(send, args, engine):
+        if len(args) == 1 and args[0].lower() == "stop":
+            engine.capture.stop()
+            send(f"Recording stopped: {engine.capture.get_written_count()} frames written, {engine.capture.get_dropped_count()} dropped")
+            return
+
+        if not (1 <= len(args) <= 2):
+            send("Usage: record <directory> [png/raw/hash], or record stop")
+            return
+
+        modes = {"png": CAPTURE_PNG, "raw": CAPTURE_RAW, "hash": CAPTURE_HASH}
+        mode = args[1].lower() if len(args) == 2 else "png"
+        if mode not in modes:
+            send(f"Unknown recording mode: {mode}")
+            return
+
+        engine.capture.start(args[0], modes[mode])
+        send(f"Recording to {args[0]}")
+
+    @staticmethod
+    def fx(send, args, engine):
+        post_process = engine.screen.post_process
+        if len(args) == 0:
+            if len(post_process.get_effects()) == 0:
+                send("No effects")
+            for effect in post_process.get_effects():
+                send(f"{effect.name.ljust(10, ' ')}  {'on ' if effect.enabled else 'off'}  {effect.time:.2f} ms")
+            return
+
+        effect = post_process.get_effect(args[0])
+        if effect is None:
+            send(f"Unknown effect: {args[0]}")
+            return
+
+        if len(args) > 1 and args[1].lower() in ["on", "off"]:
+            effect.enabled = args[1].lower() == "on"
+        else:
+            effect.enabled = not effect.enabled
+        send(f"{effect.name} {'enabled' if effect.enabled else 'disabled'}")
+
+    @staticmethod
+    def mem(send, args, engine):
+        memory = engine.memory
+        option = args[0].lower() if len(args) > 0 else ""
+
+        if option == "on":
+            memory.request(memory.enable)
+            send("Memory tracking enabled")
+        elif option == "off":
+            memory.request(memory.disable)
+            send("Memory tracking disabled")
+        elif option == "reset":
+            memory.request(memory.reset)
+            send("Memory statistics reset")
+        elif option == "surfaces":
+            send(f"Surface memory: {memory.get_surface_memory() / 1024:.1f} KiB")
+        elif not memory.is_enabled():
+            send("Memory tracking is off, enable it with 'mem on'")
+        elif option == "top":
+            for size, phase, filename, lineno, seen in memory.get_top_allocators():
+                send(f"{size / 1024:8.1f} KiB  {phase.ljust(6, ' ')}  {filename}:{lineno}  ({seen:.0%} of samples)")
+        elif option == "gc":
+            for generation, (count, total, longest) in memory.collections.items():
+                send(f"Generation {generation}: {count} collections, {total:.2f} ms total, {longest:.2f} ms longest")
+        else:
+            send("Per frame:  phase   net KiB   peak KiB   gc ms")
+            for phase, stats in memory.get_phase_stats().items():
+                send(f"{phase.rjust(17, ' ')}  {stats['net'] / 1024:8.2f}  {stats['peak'] / 1024:9.2f}  {stats['gc']:6.3f}")
+            for size, phase, filename, lineno, seen in memory.get_every_frame_allocators():
+                send(f"Allocates every frame: {filename}:{lineno} ({phase}, {size / 1024:.1f} KiB)")
+            send(f"Surface memory: {memory.get_surface_memory() / 1024:.1f} KiB")
+
+    @staticmethod
+    def exec_script(send, args, engine):
+        if len(args) == 0:
+            send("Usage: exec <file> [name=value ...], exec list, or exec stop")
+            return
+
+        if args[0].lower() == "list":
+            if not engine.scripts.has_runs():
+                send("No scripts running")
+            for script_run in engine.scripts.get_runs():
+                send(f"{script_run.script.name}  {script_run.get_progress():.0%}  {script_run.executed} commands")
+            return
+
+        if args[0].lower() == "stop":
+            engine.scripts.stop()
+            send("Scripts stopped")
+            return
+
+        variables = {}
+        for arg in args[1:]:
+            name, separator, value = arg.partition("=")
+            if not separator:
+                send(f"Invalid variable: {arg}, expected name=value")
+                return
+            variables[name] = value
+
+        def report(script_run):
+            state = "stopped" if script_run.is_cancelled() else "finished"
+            send(f"{script_run.script.name} {state}: {script_run.executed} commands, {script_run.errors} errors, {script_run.time_spent:.2f} ms")
+            for name, calls, total, longest in script_run.get_timings()[:10]:
+                send(f"{name.ljust(10, ' ')}  {calls:6} calls  {total:9.2f} ms total  {total / calls * 1000:8.1f} us avg  {longest:7.3f} ms max")
+
+        try:
+            script = engine.scripts.compile_file(args[0])
+        except (OSError, ValueError) as e:
+            send(f"Could not load script: {e}")
+            return
+
+        engine.scripts.run(script, variables, report)
+        send(f"Running {args[0]} ({script.get_length()} instructions)")
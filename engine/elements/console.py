@@ -1,7 +1,9 @@
 import threading
+import ctypes
 import os
 from time import sleep, localtime
 import msvcrt
+from engine.elements.logs import LogSink
 
 
 class Console:
@@ -21,11 +23,16 @@ class Console:
 
         self._disabled = False
 
+        # All output goes through the sink's writer thread, so send() never does terminal I/O itself
+        self.log = LogSink(self)
+
     def initialize(self):
         if self._disabled:
             return
 
-        os.system(f"title {self.engine.window.get_title()}")
+        self.enable_terminal_codes()
+        # OSC 0 sets the terminal window title
+        print(f"\033]0;{self.engine.window.get_title()}\007", end="", flush=True)
 
         self.clear()
         self.parallel_input = ParallelInput(self)
@@ -49,16 +56,33 @@ class Console:
         self.engine.commands.execute(command_string)
 
     def clear(self):
-        os.system('cls' if os.name == 'nt' else 'clear')
-        self.clear_line(self.get_raw_data(), end="")
+        # Erase the screen and move the cursor home, without starting a shell
+        print("\033[2J\033[H", end="")
+        self.clear_line(self.get_raw_data(), end="", flush=True)
+
+    @staticmethod
+    def enable_terminal_codes():
+        # Windows consoles only interpret escape codes once virtual terminal processing is switched on
+        if os.name != "nt":
+            return
+        try:
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.GetStdHandle(-11)
+            mode = ctypes.c_uint32()
+            if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+                kernel32.SetConsoleMode(handle, mode.value | 0x0004)
+        except (AttributeError, OSError):
+            pass
 
     @staticmethod
     def clear_line(text="", end="", flush=False):
         print("\r" + " " * 100 + "\r" + text, end=end, flush=flush)
 
     def quit(self):
-        self.stop()
-        self.parallel_input.quit()
+        if self.console_thread is not None:
+            self.stop()
+            self.parallel_input.quit()
+        self.log.stop()
 
     def is_running(self):
         return self._running
@@ -69,7 +93,8 @@ class Console:
 
     @staticmethod
     def get_time():
-        return f"{str(localtime().tm_hour).rjust(2, '0')}:{str(localtime().tm_min).rjust(2, '0')}:{str(localtime().tm_sec).rjust(2, '0')}"
+        t = localtime()
+        return f"{t.tm_hour:02}:{t.tm_min:02}:{t.tm_sec:02}"
 
     def get_raw_data(self):
         try:
@@ -91,12 +116,13 @@ class Console:
                 sleep(0.2)
             sleep(0.2)
 
-    def send(self, *args, time=True):
-        raw = self.get_raw_data()
-        if time:
-            self.clear_line(f"[{self.get_time()}]: {' '.join(args)}\n{raw}", end="")
-        else:
-            self.clear_line(f"{' '.join(args)}\n{raw}", end="")
+    def send(self, *args, time=True, source="console"):
+        # Queued for the log writer thread, messages are rate limited and deduplicated per source
+        self.log.push(" ".join(str(arg) for arg in args), source, time)
+
+    def write_line(self, text):
+        # Called from the log writer thread, reprints the input line under the new output
+        self.clear_line(f"{text}\n{self.get_raw_data()}", end="")
 
 
 class ParallelInput:
@@ -2,6 +2,8 @@ from engine.constants import VISIBLE, HIDDEN
 
 
 class Entity:
+    # (attribute, struct format) pairs saved in state snapshots, extend this in subclasses
+    STATE_FIELDS = (("x", "d"), ("y", "d"), ("rotation", "d"), ("scale", "d"))
 
     #
     # ===============================================================
@@ -22,9 +24,18 @@ class Entity:
         self.color: tuple[int, int, int] = color
         self.alpha: int = alpha
         self.scale: float = 1.0
+        # Sprite drawn by the default draw(), with rotation, scale and alpha applied
+        self.image = None
 
         # Private variables
         self.__visibility = VISIBLE
+        self.__update_rate = 1
+        self.__asleep = False
+        self.__wake_timer = None
+        self.__wake_topic = None
+        self.__tags = set()
+        # component type -> component
+        self.__components = {}
 
         self.engine.add_entity(self)
 
@@ -58,6 +69,63 @@ class Entity:
     def is_hidden(self):
         return self.__visibility == HIDDEN
 
+    def set_update_rate(self, rate):
+        # 1 updates every frame, N updates every Nth frame with the delta of all N frames
+        if type(rate) is not int:
+            raise TypeError("Update rate must be an integer.")
+        if rate < 1:
+            raise ValueError("Update rate must be at least 1.")
+
+        self.__update_rate = rate
+        self.engine.update_tiers.move(self)
+
+    def get_update_rate(self):
+        return self.__update_rate
+
+    def is_asleep(self):
+        return self.__asleep
+
+    def add_tag(self, *tags):
+        for tag in tags:
+            if type(tag) is not str:
+                raise TypeError("Tags must be strings.")
+        self.__tags.update(tags)
+        self.engine.entity_index.refresh(self)
+
+    def remove_tag(self, *tags):
+        self.__tags.difference_update(tags)
+        self.engine.entity_index.refresh(self)
+
+    def has_tag(self, tag):
+        return tag in self.__tags
+
+    def get_tags(self):
+        return frozenset(self.__tags)
+
+    def add_component(self, component):
+        # Components are looked up by their exact type, an entity has at most one of each type
+        if type(component) in self.__components:
+            raise Exception(f"Entity {self.name} already has a {type(component).__name__} component")
+
+        self.__components[type(component)] = component
+        self.engine.entity_index.refresh(self)
+        return component
+
+    def remove_component(self, component_type):
+        component = self.__components.pop(component_type, None)
+        if component is not None:
+            self.engine.entity_index.refresh(self)
+        return component
+
+    def get_component(self, component_type):
+        return self.__components.get(component_type)
+
+    def has_component(self, component_type):
+        return component_type in self.__components
+
+    def get_component_types(self):
+        return self.__components.keys()
+
     #
     # ===============================================================
     # ======================== CLASS METHODS ========================
@@ -67,6 +135,57 @@ class Entity:
     def broadcast(self, message):
         self.engine.broadcast(message)
 
+    def sleep(self, duration=None, topic=None):
+        """
+        Stops calling update() on this entity until it is woken.
+        :param duration: Milliseconds of timer time after which the entity wakes itself
+        :param topic: Message topic that wakes the entity, the message is then passed to broadcast_recieved
+        :return:
+        """
+        # A new sleep replaces the wake conditions of an earlier one
+        self.clear_wake_conditions()
+        self.__asleep = True
+        self.engine.update_tiers.remove(self)
+
+        if duration is not None:
+            self.__wake_timer = self.engine.schedule(duration, self.wake)
+        if topic is not None:
+            self.__wake_topic = topic
+            self.engine.subscribe(topic, self._wake_on_message)
+
+    def wake(self):
+        if not self.__asleep:
+            return
+
+        self.__asleep = False
+        self.clear_wake_conditions()
+
+        # An entity removed from the engine while asleep stays out of the update tiers
+        if self.engine.get_entity(self.name) is self:
+            self.engine.update_tiers.add(self)
+
+    def clear_wake_conditions(self):
+        if self.__wake_timer is not None:
+            self.__wake_timer.cancel()
+            self.__wake_timer = None
+        if self.__wake_topic is not None:
+            self.engine.unsubscribe(self.__wake_topic, self._wake_on_message)
+            self.__wake_topic = None
+
+    def _wake_on_message(self, message):
+        self.wake()
+        self.broadcast_recieved(message)
+
+    def subscribe(self, topic, callback=None):
+        # Defaults to the entity's own broadcast handler
+        self.engine.subscribe(topic, callback or self.broadcast_recieved)
+
+    def unsubscribe(self, topic, callback=None):
+        self.engine.unsubscribe(topic, callback or self.broadcast_recieved)
+
+    def post(self, topic, message, coalesce=False):
+        self.engine.post(topic, message, coalesce)
+
     def update(self, delta):
         """
         Override this method to update the object.
@@ -82,10 +201,19 @@ class Entity:
         Override this method to draw the object.
         For example, a rectangle would be drawn with:
         pygame.draw.rect(surface, self.color, (self.x, self.y, self.width, self.height))
+        By default, the entity's image is drawn if it has one.
         :param surface:
         :return:
         """
-        pass
+        if self.image is not None:
+            self.draw_image(surface)
+
+    def draw_image(self, surface):
+        # The transformed image is centered on the entity, since rotating changes its size
+        image = self.engine.transforms.get(self.image, self.rotation, self.scale, self.alpha)
+        width = self.width or self.image.get_width()
+        height = self.height or self.image.get_height()
+        surface.blit(image, (self.x + (width - image.get_width()) / 2, self.y + (height - image.get_height()) / 2))
 
     def initialize(self):
         pass
@@ -15,6 +15,9 @@ class Inputs:
         self.mouse_position = (0, 0)
         self.mouse_pressed = (False, False, False)
 
+        # Keys held down by scripts or commands rather than the keyboard, e.g. in headless runs
+        self.forced_keys = set()
+
     #
     # ===============================================================
     # ======================== GETTERS/SETTERS ======================
@@ -25,13 +28,27 @@ class Inputs:
         return self.engine.screen.window_position_to_screen_position(pygame.mouse.get_pos())
 
     @staticmethod
-    def is_key_pressed(key):
+    def get_key_code(key):
         if type(key) == str:
             if len(key) > 1:
                 key = key.upper()
             key = getattr(pygame, "K_" + key)
+        return key
+
+    def is_key_pressed(self, key):
+        key = self.get_key_code(key)
+        if key in self.forced_keys:
+            return True
+        if self.engine.is_headless():
+            return False
         return pygame.key.get_pressed()[key]
 
+    def press_key(self, key):
+        self.forced_keys.add(self.get_key_code(key))
+
+    def release_key(self, key):
+        self.forced_keys.discard(self.get_key_code(key))
+
     def is_mouse_pressed(self, button=LEFT_BUTTON):
         self.mouse_pressed = pygame.mouse.get_pressed(3)
         return self.mouse_pressed[button]
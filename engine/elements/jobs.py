@@ -0,0 +1,173 @@
+from collections import deque
+
+# Stop starting new job steps this many milliseconds before the next frame is due
+DEADLINE_MARGIN = 1.0
+# Headless frames have no idle time, so jobs get a fixed number of steps per frame instead
+HEADLESS_STEPS = 8
+
+
+class BackgroundJob:
+    """
+    Wraps a generator that does its work in small steps.
+    Each yield hands control back to the engine; yielding a number between 0 and 1 reports progress.
+    The generator's return value is stored as the job's result.
+    """
+    def __init__(self, name, generator, on_complete=None):
+        self.name = name
+        self.generator = generator
+        self.on_complete = on_complete
+
+        self.progress = 0.0
+        self.steps = 0
+        self.time_spent = 0
+        self.result = None
+        self.error = None
+
+        self._finished = False
+        self._cancelled = False
+
+    def get_progress(self):
+        return self.progress
+
+    def get_result(self):
+        return self.result
+
+    def is_finished(self):
+        return self._finished
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        self._cancelled = True
+        self.generator.close()
+
+    def step(self):
+        try:
+            progress = next(self.generator)
+        except StopIteration as stop:
+            self.result = stop.value
+            self.progress = 1.0
+            self._finished = True
+            return
+
+        self.steps += 1
+        if type(progress) in [int, float]:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+
+
+class JobQueue:
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.jobs = deque()
+
+        self.idle_time = 0
+        self.used_time = 0
+        self.frame_idle_time = 0
+        self.frame_used_time = 0
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def get_jobs(self):
+        return list(self.jobs)
+
+    def get_job_count(self):
+        return len(self.jobs)
+
+    def has_jobs(self):
+        return len(self.jobs) > 0
+
+    def get_idle_usage(self):
+        # Share of the idle time between frames that was spent on background jobs
+        if self.idle_time == 0:
+            return 0.0
+        return self.used_time / self.idle_time
+
+    def get_frame_idle_usage(self):
+        if self.frame_idle_time == 0:
+            return 0.0
+        return self.frame_used_time / self.frame_idle_time
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def submit(self, generator, name=None, on_complete=None):
+        if not hasattr(generator, "__next__"):
+            raise TypeError("Background jobs must be generators.")
+
+        job = BackgroundJob(name or f"job-{id(generator)}", generator, on_complete)
+        self.jobs.append(job)
+        return job
+
+    def cancel(self, job):
+        job.cancel()
+        if job in self.jobs:
+            self.jobs.remove(job)
+
+    def clear(self):
+        for job in self.jobs:
+            job.cancel()
+        self.jobs.clear()
+
+    def add_idle_time(self, ms):
+        self.idle_time += ms
+        self.frame_idle_time = ms
+
+    def start_frame(self):
+        self.frame_idle_time = 0
+        self.frame_used_time = 0
+
+    def run(self, deadline):
+        # deadline is in engine time (PyEngine.get_time()), steps are round-robin across jobs
+        get_time = self.engine.get_time
+        while len(self.jobs) > 0 and get_time() < deadline - DEADLINE_MARGIN:
+            self.step_next()
+
+    def run_steps(self, steps=HEADLESS_STEPS):
+        # Advances jobs by a fixed number of steps, so headless runs progress the same way every time
+        for _ in range(steps):
+            if len(self.jobs) == 0:
+                return
+            self.step_next()
+
+    def step_next(self):
+        get_time = self.engine.get_time
+        job = self.jobs.popleft()
+
+        step_start = get_time()
+        try:
+            job.step()
+        except Exception as e:
+            job.error = e
+            job._finished = True
+            self.engine.console.send(f"Background job {job.name} failed: {e}")
+        step_time = get_time() - step_start
+
+        job.time_spent += step_time
+        self.used_time += step_time
+        self.frame_used_time += step_time
+
+        if job.is_finished():
+            if job.on_complete is not None and job.error is None:
+                try:
+                    job.on_complete(job.result)
+                except Exception as e:
+                    # A failing callback marks the job failed instead of stopping the game loop
+                    job.error = e
+                    self.engine.console.send(f"Background job {job.name} completion callback failed: {e}")
+        else:
+            self.jobs.append(job)
@@ -0,0 +1,249 @@
+import threading
+import json
+import os
+from collections import deque
+from time import sleep, localtime, time as get_unix_time
+
+MESSAGE = 0
+SOURCE = 1
+TIMESTAMP = 2
+SHOW_TIME = 3
+
+
+class RateLimit:
+    """
+    Token bucket: a source may send `burst` messages at once and `rate` messages per second after that.
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_time = 0
+
+    def allow(self, timestamp):
+        self.tokens = min(self.burst, self.tokens + (timestamp - self.last_time) * self.rate)
+        self.last_time = timestamp
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class LogSink:
+    """
+    Takes messages from Console.send on any thread and writes them from a single writer thread.
+    Sending never blocks: when the buffer is full the message is dropped and counted instead.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, console, buffer_size=1024):
+        self.console = console
+
+        # deque.append and popleft are atomic, so senders never take a lock
+        self.buffer = deque()
+        self.buffer_size = buffer_size
+
+        self.rate = 20
+        self.burst = 40
+        self.rate_limits = {}
+
+        # source -> [message, repeat count, timestamp] of the last message written for that source
+        self.last_messages = {}
+
+        self.dropped_full = 0
+        self.dropped_rate = 0
+        # Messages that could not be written, e.g. unencodable text or a failed rotation
+        self.dropped_errors = 0
+        self.reported_drops = 0
+
+        # When off, messages only go to the log file, if any
+        self.echo = True
+
+        self.file = None
+        self.file_path = None
+        self.max_file_size = 0
+        self.file_backups = 0
+
+        # The writer thread is started by the first message, engines that never log never start it
+        self.writer_thread = None
+        self.start_lock = threading.Lock()
+        self._running = False
+        self._stopped = False
+
+    def start(self):
+        with self.start_lock:
+            if self._running or self._stopped:
+                return
+
+            self._running = True
+            self.writer_thread = threading.Thread(target=self.run)
+            self.writer_thread.daemon = True
+            self.writer_thread.start()
+
+    def stop(self):
+        with self.start_lock:
+            self._stopped = True
+            if not self._running:
+                self.close_file()
+                return
+            self._running = False
+
+        self.writer_thread.join()
+        self.close_file()
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def set_rate_limit(self, rate, burst, source=None):
+        # Without a source this changes the default for every source without its own limit
+        if rate <= 0 or burst < 1:
+            raise ValueError("Rate must be greater than 0 and burst at least 1.")
+
+        if source is None:
+            self.rate, self.burst = rate, burst
+        else:
+            self.rate_limits[source] = RateLimit(rate, burst)
+
+    def set_echo(self, echo):
+        self.echo = echo
+
+    def get_dropped_count(self):
+        return self.dropped_full + self.dropped_rate + self.dropped_errors
+
+    def get_pending_count(self):
+        return len(self.buffer)
+
+    def log_to_file(self, path, max_file_size=1024 * 1024, backups=3):
+        # Structured JSON lines, rotated to path.1, path.2... once the file passes max_file_size bytes
+        self.close_file()
+        self.file_path = path
+        self.max_file_size = max_file_size
+        self.file_backups = backups
+        self.file = open(path, "a", encoding="utf-8")
+
+    def close_file(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def push(self, message, source, show_time):
+        if len(self.buffer) >= self.buffer_size:
+            self.dropped_full += 1
+            return
+
+        self.buffer.append((message, source, get_unix_time(), show_time))
+        if not self._running:
+            self.start()
+
+    def run(self):
+        while self._running:
+            if len(self.buffer) == 0:
+                self.flush_repeats()
+                sleep(0.01)
+                continue
+            self.write_pending()
+
+        self.write_pending()
+        self.flush_repeats(force=True)
+
+    def write_pending(self):
+        while len(self.buffer) > 0:
+            entry = self.buffer.popleft()
+            # Repeats are folded first so they don't use up the source's rate limit
+            if self.is_repeat(entry):
+                continue
+            if not self.is_allowed(entry):
+                continue
+            self.write(entry[MESSAGE], entry[SOURCE], entry[TIMESTAMP], entry[SHOW_TIME])
+
+        drops = self.get_dropped_count()
+        if drops != self.reported_drops:
+            self.write(f"{drops - self.reported_drops} log messages dropped", "console", get_unix_time(), True)
+            # Counted after writing, in case the report itself could not be written
+            self.reported_drops = self.get_dropped_count()
+
+    def is_allowed(self, entry):
+        rate_limit = self.rate_limits.get(entry[SOURCE])
+        if rate_limit is None:
+            rate_limit = RateLimit(self.rate, self.burst)
+            self.rate_limits[entry[SOURCE]] = rate_limit
+
+        if rate_limit.allow(entry[TIMESTAMP]):
+            return True
+
+        self.dropped_rate += 1
+        return False
+
+    def is_repeat(self, entry):
+        last = self.last_messages.get(entry[SOURCE])
+        if last is not None and last[0] == entry[MESSAGE]:
+            last[1] += 1
+            last[2] = entry[TIMESTAMP]
+            return True
+
+        if last is not None and last[1] > 0:
+            self.write_repeat(entry[SOURCE], last)
+        self.last_messages[entry[SOURCE]] = [entry[MESSAGE], 0, entry[TIMESTAMP]]
+        return False
+
+    def flush_repeats(self, force=False):
+        # Report repeats once a source has gone quiet for a second, rather than waiting for a new message
+        now = get_unix_time()
+        for source, last in self.last_messages.items():
+            if last[1] > 0 and (force or now - last[2] > 1):
+                self.write_repeat(source, last)
+
+    def write_repeat(self, source, last):
+        self.write(f"{last[0]} (message repeated {last[1]}x)", source, last[2], True, last[1])
+        last[1] = 0
+
+    def write(self, message, source, timestamp, show_time, repeat=0):
+        # A message that can't be written is counted as dropped, it must never take the writer thread down
+        try:
+            if not self.echo:
+                pass
+            elif show_time:
+                t = localtime(timestamp)
+                self.console.write_line(f"[{t.tm_hour:02}:{t.tm_min:02}:{t.tm_sec:02}]: {message}")
+            else:
+                self.console.write_line(message)
+
+            if self.file is not None:
+                self.write_file({"time": timestamp, "source": source, "message": message, "repeat": repeat})
+        except Exception:
+            self.dropped_errors += 1
+
+    def write_file(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+        if self.max_file_size > 0 and self.file.tell() >= self.max_file_size:
+            self.rotate_file()
+
+    def rotate_file(self):
+        self.file.close()
+        try:
+            for i in range(self.file_backups - 1, 0, -1):
+                if os.path.exists(f"{self.file_path}.{i}"):
+                    os.replace(f"{self.file_path}.{i}", f"{self.file_path}.{i + 1}")
+            if self.file_backups > 0:
+                os.replace(self.file_path, f"{self.file_path}.1")
+            else:
+                os.remove(self.file_path)
+        finally:
+            # If the rotation failed (e.g. the file is open elsewhere on Windows), keep appending to the current file
+            self.file = open(self.file_path, "a", encoding="utf-8")
@@ -0,0 +1,220 @@
+import gc
+import tracemalloc
+import pygame
+from collections import deque
+from time import perf_counter
+
+# Phase statistics
+FRAMES = 0
+NET = 1
+PEAK = 2
+GC_TIME = 3
+SAMPLES = 4
+
+# Line statistics
+SIZE = 0
+SEEN = 1
+
+
+class MemoryTracker:
+    """
+    Opt-in allocation instrumentation built on tracemalloc and gc callbacks.
+    Every frame records the net and peak traced memory of each frame phase and the time spent in
+    garbage collection. Every sample_interval frames it also diffs snapshots around each phase to
+    attribute allocations to source lines; lines that allocate in nearly every sample are flagged.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine, sample_interval=30):
+        self.engine = engine
+        self.sample_interval = sample_interval
+
+        # phase -> [frames, net bytes, peak bytes, gc ms, sampled frames]
+        self.phases = {}
+        # (phase, filename, lineno) -> [bytes allocated in samples, samples it was seen in]
+        self.lines = {}
+        # generation -> [collections, total ms, longest ms]
+        self.collections = {0: [0, 0, 0], 1: [0, 0, 0], 2: [0, 0, 0]}
+
+        self.phase = None
+        self.phase_start_memory = 0
+        self.phase_snapshot = None
+        self.gc_start = 0
+
+        self.frame = 0
+        self.sampling = False
+
+        # enable/disable/reset requested from the console thread or a script, applied at the end of a frame
+        self.requests = deque()
+
+        self._enabled = False
+        self._started_tracing = False
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def is_enabled(self):
+        return self._enabled
+
+    def enable(self, traceback_frames=1):
+        if self._enabled:
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(traceback_frames)
+            self._started_tracing = True
+        gc.callbacks.append(self.gc_callback)
+        self._enabled = True
+
+    def disable(self):
+        if not self._enabled:
+            return
+
+        self._enabled = False
+        self.phase = None
+        self.phase_snapshot = None
+        gc.callbacks.remove(self.gc_callback)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def reset(self):
+        # Cleared in place, so a phase that is still open starts counting again from zero
+        self.phases.clear()
+        if self.phase is not None:
+            self.phases[self.phase] = [0, 0, 0, 0, 0]
+        self.lines.clear()
+        for collection in self.collections.values():
+            collection[:] = [0, 0, 0]
+
+    def request(self, action):
+        # Thread-safe way to call enable, disable or reset: the action runs between two frames
+        self.requests.append(action)
+
+    def get_phase_stats(self):
+        return {phase: {
+            "net": stats[NET] / max(stats[FRAMES], 1),
+            "peak": stats[PEAK] / max(stats[FRAMES], 1),
+            "gc": stats[GC_TIME] / max(stats[FRAMES], 1)
+        } for phase, stats in tuple(self.phases.items())}
+
+    def get_top_allocators(self, limit=10):
+        # Average bytes per sampled frame, largest first
+        top = []
+        for (phase, filename, lineno), stats in tuple(self.lines.items()):
+            samples = max(self.phases.get(phase, [0, 0, 0, 0, 0])[SAMPLES], 1)
+            top.append((stats[SIZE] / samples, phase, filename, lineno, stats[SEEN] / samples))
+        top.sort(reverse=True)
+        return top[:limit]
+
+    def get_every_frame_allocators(self, threshold=0.9):
+        return [entry for entry in self.get_top_allocators(len(self.lines)) if entry[4] >= threshold and self.phases.get(entry[1], [0, 0, 0, 0, 0])[SAMPLES] >= 3]
+
+    def get_surface_memory(self):
+        # Pixel memory of the surfaces the engine and its entities hold on to
+        surfaces = {}
+        for surface in [self.engine.window.surface, self.engine.screen.canvas] + self.engine.screen.backing_surfaces:
+            if surface is not None:
+                surfaces[id(surface)] = surface
+        for entity in self.engine.entities.values():
+            for value in vars(entity).values():
+                if isinstance(value, pygame.Surface):
+                    surfaces[id(value)] = value
+
+        return sum(surface.get_width() * surface.get_height() * surface.get_bytesize() for surface in surfaces.values())
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def begin_phase(self, phase):
+        if not self._enabled:
+            return
+
+        self.end_phase()
+        self.phase = phase
+        if phase not in self.phases:
+            self.phases[phase] = [0, 0, 0, 0, 0]
+
+        if self.sampling:
+            self.phase_snapshot = self.take_snapshot()
+        tracemalloc.reset_peak()
+        self.phase_start_memory = tracemalloc.get_traced_memory()[0]
+
+    def end_phase(self):
+        if self.phase is None:
+            return
+
+        stats = self.phases.get(self.phase)
+        if stats is None or not tracemalloc.is_tracing():
+            self.phase = None
+            self.phase_snapshot = None
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        stats[FRAMES] += 1
+        stats[NET] += current - self.phase_start_memory
+        stats[PEAK] += peak - self.phase_start_memory
+
+        if self.sampling and self.phase_snapshot is not None:
+            stats[SAMPLES] += 1
+            for diff in self.take_snapshot().compare_to(self.phase_snapshot, "lineno"):
+                if diff.size_diff <= 0:
+                    continue
+                frame = diff.traceback[0]
+                key = (self.phase, frame.filename, frame.lineno)
+                line = self.lines.get(key)
+                if line is None:
+                    line = [0, 0]
+                    self.lines[key] = line
+                line[SIZE] += diff.size_diff
+                line[SEEN] += 1
+            self.phase_snapshot = None
+
+        self.phase = None
+
+    def end_frame(self):
+        while len(self.requests) > 0:
+            self.end_phase()
+            self.requests.popleft()()
+
+        if not self._enabled:
+            return
+
+        self.end_phase()
+        self.frame += 1
+        self.sampling = self.frame % self.sample_interval == 0
+
+    @staticmethod
+    def take_snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ))
+
+    def gc_callback(self, phase, info):
+        if phase == "start":
+            self.gc_start = perf_counter()
+            return
+
+        duration = (perf_counter() - self.gc_start) * 1000
+        collection = self.collections.get(info["generation"])
+        if collection is None:
+            return
+        collection[0] += 1
+        collection[1] += duration
+        collection[2] = max(collection[2], duration)
+
+        stats = self.phases.get(self.phase)
+        if stats is not None:
+            stats[GC_TIME] += duration
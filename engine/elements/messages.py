@@ -0,0 +1,144 @@
+POSTED = 0
+DELIVERED = 1
+COALESCED = 2
+DROPPED = 3
+
+
+class MessageBus:
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine, max_queue_size=10000):
+        self.engine = engine
+
+        # topic -> list of callbacks, in subscription order
+        self.subscribers = {}
+        # topic -> [posted, delivered, coalesced, dropped]
+        self.counters = {}
+
+        # Messages are queued here and handed out in one batch by dispatch().
+        # dispatch() only runs on unpaused frames, so while paused messages pile up until max_queue_size,
+        # after which new ones are dropped and counted. A coalesced message takes one slot however often it's posted.
+        self.queue = []
+        self.queued_keys = set()
+        self.max_queue_size = max_queue_size
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def get_subscribers(self, topic):
+        return tuple(self.subscribers.get(topic, ()))
+
+    def get_topics(self):
+        return list(self.subscribers.keys())
+
+    def get_pending_count(self):
+        return len(self.queue)
+
+    def set_max_queue_size(self, max_queue_size):
+        if type(max_queue_size) is not int or max_queue_size < 1:
+            raise ValueError("Max queue size must be a positive integer.")
+        self.max_queue_size = max_queue_size
+
+    def get_counters(self, topic):
+        counters = self.counters.get(topic, (0, 0, 0, 0))
+        return {"posted": counters[POSTED], "delivered": counters[DELIVERED], "coalesced": counters[COALESCED], "dropped": counters[DROPPED]}
+
+    def reset_counters(self):
+        self.counters = {}
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def subscribe(self, topic, callback):
+        if not callable(callback):
+            raise TypeError("Subscriber callback must be callable.")
+
+        callbacks = self.subscribers.setdefault(topic, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def unsubscribe(self, topic, callback):
+        callbacks = self.subscribers.get(topic)
+        if callbacks is None or callback not in callbacks:
+            return
+
+        callbacks.remove(callback)
+        if len(callbacks) == 0:
+            self.subscribers.pop(topic)
+
+    def unsubscribe_all(self, owner):
+        # Remove every bound method belonging to owner, e.g. an entity being removed
+        for topic in list(self.subscribers.keys()):
+            for callback in list(self.subscribers[topic]):
+                if getattr(callback, "__self__", None) is owner:
+                    self.unsubscribe(topic, callback)
+
+    def post(self, topic, message, coalesce=False):
+        # Coalesced messages are compared by value, so they must be hashable
+        if coalesce:
+            try:
+                key = (topic, message)
+                hash(key)
+            except TypeError:
+                raise TypeError(f"Coalesced messages must be hashable, got {type(message).__name__} on topic {topic}.")
+
+        counters = self._get_topic_counters(topic)
+        counters[POSTED] += 1
+
+        # Nobody is listening, so there is nothing to queue
+        if topic not in self.subscribers:
+            return
+
+        if coalesce and key in self.queued_keys:
+            counters[COALESCED] += 1
+            return
+
+        if len(self.queue) >= self.max_queue_size:
+            counters[DROPPED] += 1
+            return
+
+        if coalesce:
+            self.queued_keys.add(key)
+        self.queue.append((topic, message))
+
+    def dispatch(self):
+        if len(self.queue) == 0:
+            return
+
+        # Swap the queue out so messages posted while delivering land in the next batch
+        queue = self.queue
+        self.queue = []
+        self.queued_keys = set()
+
+        for topic, message in queue:
+            callbacks = self.subscribers.get(topic)
+            if callbacks is None:
+                continue
+
+            callbacks = tuple(callbacks)
+            for callback in callbacks:
+                callback(message)
+            # Counters may have been reset since the message was posted
+            self._get_topic_counters(topic)[DELIVERED] += len(callbacks)
+
+    def clear(self):
+        self.queue = []
+        self.queued_keys = set()
+
+    def _get_topic_counters(self, topic):
+        counters = self.counters.get(topic)
+        if counters is None:
+            counters = [0, 0, 0, 0]
+            self.counters[topic] = counters
+        return counters
@@ -0,0 +1,276 @@
+import ctypes
+import os
+import sys
+import threading
+import tracemalloc
+from bisect import bisect_left
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FRAME_TIME_BUCKETS = (1, 2, 4, 8, 16, 17, 20, 25, 33, 50, 100, 250)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Counter:
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def render(self):
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {self.value}"
+        ]
+
+
+class Gauge:
+    """
+    Either set from the frame loop, or given a function that is only called when the metrics are scraped.
+    """
+    def __init__(self, name, description, function=None):
+        self.name = name
+        self.description = description
+        self.function = function
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        return self.function() if self.function is not None else self.value
+
+    def render(self):
+        value = self.get()
+        if value is None:
+            return []
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {float(value)}"
+        ]
+
+
+class Histogram:
+    def __init__(self, name, description, buckets, window=300):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+        # Recent observations, quantiles are only computed from these when scraped
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def get_quantile(self, quantile):
+        values = sorted(list(self.recent))
+        if len(values) == 0:
+            return 0
+        return values[min(int(quantile * len(values)), len(values) - 1)]
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram"
+        ]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+
+        # Percentiles over the recent window, exposed as a separate gauge so the histogram stays valid
+        lines.append(f"# TYPE {self.name}_recent gauge")
+        for quantile in QUANTILES:
+            lines.append(f'{self.name}_recent{{quantile="{quantile}"}} {self.get_quantile(quantile)}')
+        return lines
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ["/", "/metrics"]:
+            self.send_error(404)
+            return
+
+        body = self.server.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep scrapes out of the console
+        pass
+
+
+class Metrics:
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.metrics = {}
+
+        self.server = None
+        self.server_thread = None
+
+        self.frames = self.counter("engine_frames_total", "Frames completed.")
+        self.commands = self.counter("engine_commands_executed_total", "Console commands executed.")
+        self.frame_time = self.histogram("engine_frame_time_ms", "Time between frames in milliseconds.", FRAME_TIME_BUCKETS)
+        self.processing_time = self.histogram("engine_processing_time_ms", "Time spent working each frame in milliseconds.", FRAME_TIME_BUCKETS)
+
+        self.gauge("engine_entities", "Entities registered with the engine.", lambda: len(self.engine.entities))
+        self.gauge("engine_paused", "1 if the engine is paused.", lambda: int(self.engine.is_paused()))
+        self.gauge("engine_timer_time_ms", "Pause-aware timer time in milliseconds.", self.engine.get_timer_time)
+        self.gauge("engine_framerate", "Average framerate over the last frames.", self.engine.get_framerate)
+        self.gauge("process_resident_memory_bytes", "Current resident memory (working set on Windows) of the process.", get_resident_memory)
+        self.gauge("process_max_resident_memory_bytes", "Peak resident memory of the process.", get_max_resident_memory)
+        self.gauge("python_traced_memory_bytes", "Memory allocated by Python, only while tracemalloc is tracing.", get_traced_memory)
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def get(self, name):
+        return self.metrics.get(name)
+
+    def is_serving(self):
+        return self.server is not None
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise Exception(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, description=""):
+        return self.register(Counter(name, description))
+
+    def gauge(self, name, description="", function=None):
+        return self.register(Gauge(name, description, function))
+
+    def histogram(self, name, description="", buckets=FRAME_TIME_BUCKETS):
+        return self.register(Histogram(name, description, buckets))
+
+    def update(self):
+        # Called once per frame, only plain additions so it stays cheap
+        self.frames.inc()
+        self.frame_time.observe(self.engine.get_delta_time())
+        self.processing_time.observe(self.engine.get_processing_time())
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9100, host="127.0.0.1"):
+        if self.server is not None:
+            raise RuntimeError("Metrics are already being served.")
+
+        self.server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        self.server.daemon_threads = True
+        self.server.metrics = self
+
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+    def stop(self):
+        if self.server is None:
+            return
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        self.server_thread = None
+
+
+class ProcessMemoryCounters(ctypes.Structure):
+    _fields_ = [
+        ("cb", ctypes.c_uint32),
+        ("PageFaultCount", ctypes.c_uint32),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t)
+    ]
+
+
+def get_process_memory_counters():
+    # Windows only, None if the counters can't be read
+    try:
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.c_void_p(kernel32.GetCurrentProcess()), ctypes.byref(counters), counters.cb):
+            return None
+        return counters
+    except (AttributeError, OSError):
+        return None
+
+
+def get_resident_memory():
+    if os.name == "nt":
+        counters = get_process_memory_counters()
+        return counters.WorkingSetSize if counters is not None else None
+
+    try:
+        # Second field is the resident set, in pages
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No procfs, e.g. macOS, the gauge is left out of the output
+        return None
+
+
+def get_max_resident_memory():
+    if os.name == "nt":
+        counters = get_process_memory_counters()
+        return counters.PeakWorkingSetSize if counters is not None else None
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def get_traced_memory():
+    if not tracemalloc.is_tracing():
+        return None
+    return tracemalloc.get_traced_memory()[0]
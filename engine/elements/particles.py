@@ -0,0 +1,149 @@
+import zlib
+import numpy as np
+import pygame
+from engine.elements.entity import Entity
+from engine.constants import X, Y, PARTICLE_SPRITES, PARTICLE_PIXELS
+
+
+class ParticleEmitter(Entity):
+    """
+    Keeps every particle of an effect in NumPy arrays and updates them in one vectorized step,
+    so thousands of particles cost one update() and one draw() call per frame.
+    Velocities and gravity are in pixels per millisecond, lifetimes in milliseconds.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine, name, x, y, capacity=1000, color=(255, 255, 255), sprite=None, seed=None):
+        super().__init__(engine, name, x, y, 0, 0, color, 255)
+
+        self.capacity = capacity
+        self.count = 0
+
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.float32)
+        self.colors = np.zeros((capacity, 3), dtype=np.uint8)
+
+        self.gravity = np.zeros(2, dtype=np.float32)
+        self.sprite = sprite
+        self.draw_mode = PARTICLE_SPRITES if sprite is not None else PARTICLE_PIXELS
+
+        if seed is None and engine.get_seed() is not None:
+            # Follows the run seed, with a stream per emitter name so emitters don't share random numbers
+            seed = [engine.get_seed() % 2 ** 32, zlib.crc32(name.encode())]
+        self.random = np.random.default_rng(seed)
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def get_count(self):
+        return self.count
+
+    def set_gravity(self, gravity):
+        self.gravity[:] = gravity
+
+    def set_sprite(self, sprite):
+        self.sprite = sprite
+        if sprite is None:
+            self.draw_mode = PARTICLE_PIXELS
+
+    def set_draw_mode(self, draw_mode):
+        if draw_mode not in [PARTICLE_SPRITES, PARTICLE_PIXELS]:
+            raise ValueError("Invalid particle draw mode.")
+        if draw_mode == PARTICLE_SPRITES and self.sprite is None:
+            raise ValueError("Sprite draw mode needs a sprite.")
+
+        self.draw_mode = draw_mode
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def emit(self, amount, speed=(0.05, 0.2), angle=(0, 360), lifetime=(500, 1000), color=None):
+        # Particles past the capacity are dropped rather than growing the arrays mid-frame
+        amount = min(amount, self.capacity - self.count)
+        if amount <= 0:
+            return 0
+
+        start, end = self.count, self.count + amount
+        angles = np.radians(self.random.uniform(angle[0], angle[1], amount))
+        speeds = self.random.uniform(speed[0], speed[1], amount)
+
+        self.position[start:end, X] = self.x
+        self.position[start:end, Y] = self.y
+        self.velocity[start:end, X] = np.cos(angles) * speeds
+        self.velocity[start:end, Y] = np.sin(angles) * speeds
+        self.lifetime[start:end] = self.random.uniform(lifetime[0], lifetime[1], amount)
+        self.colors[start:end] = color if color is not None else self.color
+
+        self.count = end
+        return amount
+
+    def clear(self):
+        self.count = 0
+
+    def update(self, delta):
+        count = self.count
+        if count == 0:
+            return
+
+        self.velocity[:count] += self.gravity * delta
+        self.position[:count] += self.velocity[:count] * delta
+        self.lifetime[:count] -= delta
+
+        self.retire()
+
+    def retire(self):
+        count = self.count
+        dead = np.flatnonzero(self.lifetime[:count] <= 0)
+        if len(dead) == 0:
+            return
+
+        # Swap-remove: live particles from the tail move into dead slots at the front
+        new_count = count - len(dead)
+        holes = dead[dead < new_count]
+        tail_alive = np.flatnonzero(self.lifetime[new_count:count] > 0) + new_count
+
+        self.position[holes] = self.position[tail_alive]
+        self.velocity[holes] = self.velocity[tail_alive]
+        self.lifetime[holes] = self.lifetime[tail_alive]
+        self.colors[holes] = self.colors[tail_alive]
+
+        self.count = new_count
+
+    def reset(self):
+        self.clear()
+
+    def draw(self, surface):
+        if self.count == 0:
+            return
+
+        if self.draw_mode == PARTICLE_SPRITES:
+            self.draw_sprites(surface)
+        else:
+            self.draw_pixels(surface)
+
+    def draw_sprites(self, surface):
+        offset = np.array(self.sprite.get_size(), dtype=np.float32) / 2
+        positions = (self.position[:self.count] - offset).astype(np.int32).tolist()
+        surface.blits([(self.sprite, position) for position in positions], False)
+
+    def draw_pixels(self, surface):
+        width, height = surface.get_size()
+        positions = self.position[:self.count].astype(np.int32)
+        inside = (positions[:, X] >= 0) & (positions[:, X] < width) & (positions[:, Y] >= 0) & (positions[:, Y] < height)
+
+        # pixels3d is a view straight into the surface, it keeps the surface locked until deleted
+        pixels = pygame.surfarray.pixels3d(surface)
+        pixels[positions[inside, X], positions[inside, Y]] = self.colors[:self.count][inside]
+        del pixels
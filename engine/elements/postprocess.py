@@ -0,0 +1,208 @@
+import numpy as np
+import pygame
+from time import perf_counter
+from engine.constants import X, Y
+
+
+class Effect:
+    """
+    Base class for post-processing effects.
+    apply() gets a (width, height, 3) uint8 view straight into the screen surface and must modify it
+    in place, using chain.get_scratch() for any temporary arrays so nothing is allocated per frame.
+    """
+    def __init__(self, name, enabled=True):
+        self.name = name
+        self.enabled = enabled
+        self.time = 0.0  # Smoothed milliseconds per frame
+
+    def apply(self, pixels, chain):
+        pass
+
+    def resize(self, size):
+        # Called when the screen resolution changes, for effects that precompute per-pixel data
+        pass
+
+
+class ColorGrade(Effect):
+    """
+    Per-channel gain, offset and gamma, applied through a 256 entry lookup table per channel.
+    """
+    def __init__(self, name="grade", gain=(1.0, 1.0, 1.0), offset=(0, 0, 0), gamma=(1.0, 1.0, 1.0), enabled=True):
+        super().__init__(name, enabled)
+        self.lut = np.zeros((3, 256), dtype=np.uint8)
+        self.set_grade(gain, offset, gamma)
+
+    def set_grade(self, gain, offset, gamma):
+        values = np.arange(256, dtype=np.float32) / 255
+        for channel in range(3):
+            graded = (values ** gamma[channel]) * gain[channel] * 255 + offset[channel]
+            self.lut[channel] = np.clip(graded, 0, 255).astype(np.uint8)
+
+    def apply(self, pixels, chain):
+        scratch = chain.get_scratch("grade", pixels.shape[:2], np.uint8)
+        for channel in range(3):
+            np.take(self.lut[channel], pixels[:, :, channel], out=scratch)
+            pixels[:, :, channel] = scratch
+
+
+class Vignette(Effect):
+    """
+    Darkens towards the corners. strength is how dark the corners get, from 0 to 1.
+    """
+    def __init__(self, name="vignette", strength=0.5, enabled=True):
+        super().__init__(name, enabled)
+        self.strength = strength
+        self.mask = None
+
+    def resize(self, size):
+        x = np.linspace(-1, 1, size[X], dtype=np.float32)[:, None]
+        y = np.linspace(-1, 1, size[Y], dtype=np.float32)[None, :]
+        falloff = np.clip((x * x + y * y) / 2, 0, 1)
+        # Fixed point, 256 is full brightness
+        self.mask = ((1 - falloff * self.strength) * 256).astype(np.uint16)
+
+    def apply(self, pixels, chain):
+        scratch = chain.get_scratch("wide", pixels.shape[:2], np.uint16)
+        for channel in range(3):
+            np.multiply(pixels[:, :, channel], self.mask, out=scratch)
+            np.right_shift(scratch, 8, out=scratch)
+            pixels[:, :, channel] = scratch
+
+
+class Posterize(Effect):
+    """
+    Reduces every channel to `levels` values.
+    """
+    def __init__(self, name="posterize", levels=4, enabled=True):
+        super().__init__(name, enabled)
+        self.step = max(256 // levels, 1)
+
+    def apply(self, pixels, chain):
+        np.floor_divide(pixels, self.step, out=pixels)
+        np.multiply(pixels, self.step, out=pixels)
+
+
+class BoxBlur(Effect):
+    """
+    Separable box blur with the given radius, repeated `passes` times to approximate a gaussian.
+    """
+    def __init__(self, name="blur", radius=2, passes=2, enabled=True):
+        super().__init__(name, enabled)
+        self.radius = radius
+        self.passes = passes
+
+    def apply(self, pixels, chain):
+        size = 2 * self.radius + 1
+        total = chain.get_scratch("wide", pixels.shape[:2], np.uint16)
+        source = chain.get_scratch("blur", pixels.shape[:2], np.uint16)
+
+        for channel in range(3):
+            for _ in range(self.passes):
+                for axis in (X, Y):
+                    source[...] = pixels[:, :, channel]
+                    total[...] = source
+                    for offset in range(1, self.radius + 1):
+                        # Clamp at the edges by only adding the part of each shifted copy that overlaps
+                        if axis == X:
+                            total[offset:, :] += source[:-offset, :]
+                            total[:offset, :] += source[:1, :]
+                            total[:-offset, :] += source[offset:, :]
+                            total[-offset:, :] += source[-1:, :]
+                        else:
+                            total[:, offset:] += source[:, :-offset]
+                            total[:, :offset] += source[:, :1]
+                            total[:, :-offset] += source[:, offset:]
+                            total[:, -offset:] += source[:, -1:]
+                    np.floor_divide(total, size, out=total)
+                    pixels[:, :, channel] = total
+
+
+class PostProcess:
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.effects = []
+
+        self.scratch = {}
+        self.size = None
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def get_effect(self, name):
+        for effect in self.effects:
+            if effect.name == name:
+                return effect
+        return None
+
+    def get_effects(self):
+        return list(self.effects)
+
+    def has_enabled_effects(self):
+        return any(effect.enabled for effect in self.effects)
+
+    def set_enabled(self, name, enabled):
+        effect = self.get_effect(name)
+        if effect is None:
+            raise ValueError(f"Unknown effect: {name}")
+        effect.enabled = enabled
+
+    def get_scratch(self, name, shape, dtype):
+        # Scratch buffers are shared between effects and only reallocated when the screen size changes
+        buffer = self.scratch.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self.scratch[name] = buffer
+        return buffer
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def add(self, effect, index=None):
+        if self.get_effect(effect.name) is not None:
+            raise Exception(f"Effect {effect.name} already added")
+
+        if index is None:
+            self.effects.append(effect)
+        else:
+            self.effects.insert(index, effect)
+        if self.size is not None:
+            effect.resize(self.size)
+
+    def remove(self, name):
+        effect = self.get_effect(name)
+        if effect is not None:
+            self.effects.remove(effect)
+
+    def apply(self):
+        if not self.has_enabled_effects():
+            return
+
+        surface = self.engine.screen.target
+        size = surface.get_size()
+        if size != self.size:
+            self.size = size
+            for effect in self.effects:
+                effect.resize(size)
+
+        # pixels3d is a view into the surface, it keeps the surface locked until it is deleted
+        pixels = pygame.surfarray.pixels3d(surface)
+        for effect in self.effects:
+            if not effect.enabled:
+                continue
+            start = perf_counter()
+            effect.apply(pixels, self)
+            effect.time = effect.time * 0.9 + (perf_counter() - start) * 1000 * 0.1
+        del pixels
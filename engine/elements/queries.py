@@ -0,0 +1,170 @@
+TYPE = 0
+TAG = 1
+COMPONENT = 2
+
+
+class QueryView:
+    """
+    Live result of an entity query, kept up to date by the EntityIndex as entities are added, removed,
+    tagged or given components. Entities are iterated in the order they started matching.
+    """
+    def __init__(self, required, excluded):
+        self.required = required
+        self.excluded = excluded
+
+        # id(entity) -> entity, so membership changes are O(1) and iteration order is stable
+        self.members = {}
+
+    def __iter__(self):
+        # Iterates over a copy, so entities can be removed or retagged while looping over a view
+        return iter(tuple(self.members.values()))
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, entity):
+        return id(entity) in self.members
+
+    def __bool__(self):
+        return len(self.members) > 0
+
+    def first(self):
+        return next(iter(self.members.values()), None)
+
+    def to_list(self):
+        return list(self.members.values())
+
+    def matches(self, keys):
+        return self.required <= keys and self.excluded.isdisjoint(keys)
+
+
+class EntityIndex:
+    """
+    Indexes entities by type (including base classes), tag and component type.
+    Every entity has a set of keys; when it changes, only the buckets and views that depend on the
+    keys that were added or removed are touched, so nothing is ever rescanned.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine):
+        self.engine = engine
+
+        # key -> {id(entity): entity}
+        self.buckets = {}
+        # id(entity) -> frozenset of keys the entity is indexed under
+        self.entity_keys = {}
+
+        # (required, excluded) -> view
+        self.views = {}
+        # key -> views whose result depends on it
+        self.views_by_key = {}
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def get_count(self, key):
+        return len(self.buckets.get(key, ()))
+
+    def get_view_count(self):
+        return len(self.views)
+
+    @staticmethod
+    def get_keys(entity):
+        keys = {(TYPE, cls) for cls in type(entity).__mro__ if cls is not object}
+        keys.update((TAG, tag) for tag in entity.get_tags())
+        keys.update((COMPONENT, component_type) for component_type in entity.get_component_types())
+        return frozenset(keys)
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def add(self, entity):
+        self.entity_keys[id(entity)] = frozenset()
+        self.refresh(entity)
+
+    def remove(self, entity):
+        keys = self.entity_keys.pop(id(entity), None)
+        if keys is None:
+            return
+
+        for key in keys:
+            self.buckets[key].pop(id(entity))
+        for view in self.get_dependent_views(keys):
+            view.members.pop(id(entity), None)
+
+    def refresh(self, entity):
+        # Called whenever an entity's tags or components change
+        old_keys = self.entity_keys.get(id(entity))
+        if old_keys is None:
+            # Not registered with the engine (yet), it is indexed when it is added
+            return
+
+        new_keys = self.get_keys(entity)
+        if new_keys == old_keys:
+            return
+        self.entity_keys[id(entity)] = new_keys
+
+        for key in old_keys - new_keys:
+            self.buckets[key].pop(id(entity))
+        for key in new_keys - old_keys:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = {}
+                self.buckets[key] = bucket
+            bucket[id(entity)] = entity
+
+        for view in self.get_dependent_views(old_keys ^ new_keys):
+            if view.matches(new_keys):
+                view.members[id(entity)] = entity
+            else:
+                view.members.pop(id(entity), None)
+
+    def get_dependent_views(self, keys):
+        views = {}
+        for key in keys:
+            for view in self.views_by_key.get(key, ()):
+                views[id(view)] = view
+        return views.values()
+
+    def query(self, required, excluded=frozenset()):
+        required = frozenset(required)
+        excluded = frozenset(excluded)
+        if len(required) == 0:
+            raise ValueError("A query needs at least one type, tag or component to match.")
+
+        view = self.views.get((required, excluded))
+        if view is not None:
+            return view
+
+        view = QueryView(required, excluded)
+        # Fill the view from the smallest bucket it needs, in the order entities were indexed
+        smallest = min((self.buckets.get(key, {}) for key in required), key=len)
+        for entity_id, entity in smallest.items():
+            if view.matches(self.entity_keys[entity_id]):
+                view.members[entity_id] = entity
+
+        self.views[(required, excluded)] = view
+        for key in required | excluded:
+            self.views_by_key.setdefault(key, []).append(view)
+        return view
+
+    def release(self, view):
+        # Stops keeping a view up to date, for queries that are no longer needed
+        if self.views.pop((view.required, view.excluded), None) is None:
+            return
+
+        for key in view.required | view.excluded:
+            self.views_by_key[key].remove(view)
+            if len(self.views_by_key[key]) == 0:
+                del self.views_by_key[key]
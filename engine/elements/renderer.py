@@ -0,0 +1,127 @@
+import queue
+import threading
+from time import perf_counter
+
+BUFFER = 0
+SURFACE = 1
+DRAW_SIZE = 2
+WINDOW_POSITION = 3
+
+
+class RenderThread:
+    """
+    Opt-in pipelined rendering.
+    The main thread updates and draws frame N+1 into one screen buffer while this thread scales frame N
+    onto the window and flips it. pygame releases the GIL during scale, blit and flip, so both run at
+    the same time on multi-core machines. A buffer is only drawn into again once it has been presented.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine):
+        self.engine = engine
+
+        # Held while touching the display, so the window is never recreated in the middle of a flip
+        self.lock = threading.Lock()
+
+        # Holds at most one presented frame, so the main thread never gets more than a frame ahead
+        self.queue = None
+        self.free = []
+        self.render_thread = None
+
+        self.frames = 0
+        self.render_time = 0.0  # Smoothed milliseconds per frame spent on the render thread
+        self.wait_time = 0.0  # Smoothed milliseconds per frame the main thread waited for a free buffer
+
+        self._enabled = False
+        self._running = False
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def is_enabled(self):
+        return self._enabled
+
+    def is_running(self):
+        return self._running
+
+    def enable(self):
+        if self.engine.is_running():
+            raise RuntimeError("Pipelined rendering must be enabled before the game starts.")
+
+        self.engine.screen.set_buffer_count(2)
+        if self.engine.screen.surface is not None:
+            self.engine.screen.allocate()
+        self._enabled = True
+
+    def get_render_time(self):
+        return self.render_time
+
+    def get_wait_time(self):
+        return self.wait_time
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def start(self):
+        if not self._enabled or self._running:
+            return
+
+        self.queue = queue.Queue(1)
+        self.free = [threading.Event() for _ in range(self.engine.screen.buffer_count)]
+        for event in self.free:
+            event.set()
+
+        self._running = True
+        self.render_thread = threading.Thread(target=self.run)
+        self.render_thread.daemon = True
+        self.render_thread.start()
+
+    def stop(self):
+        if not self._running:
+            return
+
+        self._running = False
+        # Let the last submitted frame be presented before the display goes away
+        self.queue.put(None)
+        self.render_thread.join()
+
+    def submit(self):
+        screen = self.engine.screen
+        self.free[screen.buffer_index].clear()
+        # The geometry is copied with the frame, a resize only affects frames submitted after it
+        self.queue.put((screen.buffer_index, screen.target, screen.draw_size, screen.window_position))
+
+        screen.swap_buffers()
+        start = perf_counter()
+        self.free[screen.buffer_index].wait()
+        self.wait_time = self.wait_time * 0.9 + (perf_counter() - start) * 1000 * 0.1
+
+    def run(self):
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                return
+
+            start = perf_counter()
+            try:
+                with self.lock:
+                    self.engine.screen.blit_to_window(frame[SURFACE], frame[DRAW_SIZE], frame[WINDOW_POSITION])
+                    self.engine.draw_frame()
+            except Exception as e:
+                self.engine.console.send("Render thread error:", e, source="renderer")
+            finally:
+                self.free[frame[BUFFER]].set()
+
+            self.frames += 1
+            self.render_time = self.render_time * 0.9 + (perf_counter() - start) * 1000 * 0.1
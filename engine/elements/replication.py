@@ -0,0 +1,501 @@
+import socket
+import struct
+import heapq
+import random
+from itertools import count
+from time import time as get_unix_time
+
+# Packet types
+HELLO = 1
+ACK = 2
+SNAPSHOT = 3
+
+# Record flags
+FULL = 1
+REMOVED = 2
+
+PACKET_HEADER = struct.Struct("<BIIdBBH")  # type, tick, baseline tick, server time, part, part count, records
+CLIENT_PACKET = struct.Struct("<BI")  # type, tick
+RECORD_HEADER = struct.Struct("<HB")  # entity id, flags
+FIELD_MASK = struct.Struct("<I")
+NAME_LENGTH = struct.Struct("<B")
+
+MAX_PACKET_SIZE = 1200
+HISTORY_LENGTH = 64
+INTERPOLATED_FORMATS = "fd"
+
+
+class EntityCodec:
+    """
+    Packs an entity class's STATE_FIELDS, either all of them or only the ones set in a bit mask.
+    """
+    def __init__(self, state_fields):
+        if len(state_fields) > 32:
+            raise ValueError("Replicated entities can have at most 32 state fields.")
+
+        self.names = tuple(field[0] for field in state_fields)
+        self.formats = tuple(field[1] for field in state_fields)
+        self.full_mask = (1 << len(self.names)) - 1
+        self.structs = {}
+
+    def get_struct(self, mask):
+        packer = self.structs.get(mask)
+        if packer is None:
+            packer = struct.Struct("<" + "".join(fmt for i, fmt in enumerate(self.formats) if mask & (1 << i)))
+            self.structs[mask] = packer
+        return packer
+
+    def read(self, entity):
+        return tuple(getattr(entity, name) for name in self.names)
+
+    def diff(self, old, new):
+        mask = 0
+        for i in range(len(new)):
+            if old[i] != new[i]:
+                mask |= 1 << i
+        return mask
+
+    def pack(self, values, mask):
+        return self.get_struct(mask).pack(*[value for i, value in enumerate(values) if mask & (1 << i)])
+
+    def unpack(self, data, offset, mask, base):
+        packer = self.get_struct(mask)
+        changed = iter(packer.unpack_from(data, offset))
+        values = tuple(next(changed) if mask & (1 << i) else base[i] for i in range(len(self.names)))
+        return values, offset + packer.size
+
+
+def get_codec(codecs, entity):
+    codec = codecs.get(type(entity))
+    if codec is None:
+        codec = EntityCodec(entity.STATE_FIELDS)
+        codecs[type(entity)] = codec
+    return codec
+
+
+class SimulatedLink:
+    """
+    Wraps a UDP socket and drops or delays outgoing packets, for testing over localhost.
+    """
+    def __init__(self, sock, loss=0.0, latency=0, jitter=0, seed=None):
+        self.socket = sock
+        self.loss = loss
+        self.latency = latency  # Milliseconds
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.queue = []
+        self.sequence = count()
+
+    def sendto(self, data, address):
+        if self.random.random() < self.loss:
+            return
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay <= 0:
+            self.socket.sendto(data, address)
+            return
+        heapq.heappush(self.queue, (get_unix_time() + delay / 1000, next(self.sequence), data, address))
+
+    def flush(self):
+        now = get_unix_time()
+        while len(self.queue) > 0 and self.queue[0][0] <= now:
+            _, _, data, address = heapq.heappop(self.queue)
+            self.socket.sendto(data, address)
+
+
+class ReplicationPeer:
+
+    def __init__(self, engine, address):
+        self.engine = engine
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.socket.bind(address)
+        self.link = self.socket
+
+        self.codecs = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.handle = None
+
+    def get_address(self):
+        return self.socket.getsockname()
+
+    def simulate_network(self, loss=0.0, latency=0, jitter=0, seed=None):
+        self.link = SimulatedLink(self.socket, loss, latency, jitter, seed)
+
+    def send(self, data, address):
+        self.bytes_sent += len(data)
+        self.link.sendto(data, address)
+
+    def receive(self):
+        if self.link is not self.socket:
+            self.link.flush()
+
+        packets = []
+        while True:
+            try:
+                data, address = self.socket.recvfrom(65536)
+            except (BlockingIOError, ConnectionResetError):
+                break
+            self.bytes_received += len(data)
+            packets.append((data, address))
+        return packets
+
+    def start(self):
+        # Runs every frame through the engine's scheduler
+        self.handle = self.engine.schedule_frames(1, self.update, repeat=True)
+
+    def stop(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        self.socket.close()
+
+    def update(self):
+        pass
+
+
+class ClientState:
+    def __init__(self, address):
+        self.address = address
+        self.acked_tick = 0
+        # tick -> {entity id: values} as the client will have it once that tick is acknowledged
+        self.history = {}
+
+
+class ReplicationServer(ReplicationPeer):
+    """
+    Sends entity state to every client that said hello, delta-compressed against the last tick the
+    client acknowledged. Entities whose state did not change since then cost nothing.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine, address=("127.0.0.1", 0), tick_frames=1):
+        super().__init__(engine, address)
+
+        self.tick_frames = tick_frames
+        # Packets per client per tick, caps bandwidth and keeps snapshots small enough to survive loss
+        self.max_packets = 4
+        self.tick = 0
+        self.frame = 0
+
+        self.clients = {}
+        self.entity_ids = {}
+        self.next_entity_id = 1
+
+        # Called as interest_filter(address, entity), entities it rejects are not sent to that client
+        self.interest_filter = None
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def set_interest_filter(self, interest_filter):
+        self.interest_filter = interest_filter
+
+    def get_clients(self):
+        return list(self.clients.keys())
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def get_entity_id(self, name):
+        entity_id = self.entity_ids.get(name)
+        if entity_id is None:
+            if self.next_entity_id > 0xFFFF:
+                raise RuntimeError("Too many replicated entities.")
+            entity_id = self.next_entity_id
+            self.entity_ids[name] = entity_id
+            self.next_entity_id += 1
+        return entity_id
+
+    def update(self):
+        for data, address in self.receive():
+            if len(data) < CLIENT_PACKET.size:
+                continue
+            packet_type, tick = CLIENT_PACKET.unpack_from(data)
+
+            client = self.clients.get(address)
+            if packet_type == HELLO and client is None:
+                self.clients[address] = ClientState(address)
+            elif packet_type == ACK and client is not None and tick > client.acked_tick and tick in client.history:
+                client.acked_tick = tick
+                # Anything older than the acknowledged tick can never be a baseline again
+                for old in [t for t in client.history if t < tick]:
+                    client.history.pop(old)
+
+        self.frame += 1
+        if self.frame % self.tick_frames == 0 and len(self.clients) > 0:
+            self.send_snapshots()
+
+    def send_snapshots(self):
+        self.tick += 1
+        server_time = self.engine.get_timer_time()
+
+        states = {}
+        for name, entity in self.engine.entities.items():
+            codec = get_codec(self.codecs, entity)
+            states[name] = (self.get_entity_id(name), entity, codec, codec.read(entity))
+
+        for client in self.clients.values():
+            self.send_snapshot(client, states, server_time)
+
+    def send_snapshot(self, client, states, server_time):
+        # Fall back to a full snapshot if the acknowledged tick has dropped out of the history
+        baseline_tick = client.acked_tick if client.acked_tick in client.history else 0
+        baseline = client.history.get(baseline_tick, {})
+
+        # The state the client will have once it applies this tick: the baseline plus whatever fits
+        current = dict(baseline)
+        parts = [[]]
+        size = PACKET_HEADER.size
+        visible = set()
+
+        for name, (entity_id, entity, codec, values) in states.items():
+            if self.interest_filter is not None and not self.interest_filter(client.address, entity):
+                continue
+            visible.add(entity_id)
+
+            old = baseline.get(entity_id)
+            if old is None:
+                type_name = type(entity).__name__.encode()
+                name_bytes = name.encode()
+                record = (
+                    RECORD_HEADER.pack(entity_id, FULL)
+                    + NAME_LENGTH.pack(len(name_bytes)) + name_bytes
+                    + NAME_LENGTH.pack(len(type_name)) + type_name
+                    + FIELD_MASK.pack(codec.full_mask) + codec.pack(values, codec.full_mask)
+                )
+            else:
+                mask = codec.diff(old, values)
+                if mask == 0:
+                    continue
+                record = RECORD_HEADER.pack(entity_id, 0) + FIELD_MASK.pack(mask) + codec.pack(values, mask)
+
+            size = self.add_record(parts, size, record)
+            if size is None:
+                break
+            current[entity_id] = values
+
+        for entity_id in baseline:
+            if entity_id not in visible and size is not None:
+                size = self.add_record(parts, size, RECORD_HEADER.pack(entity_id, REMOVED))
+                if size is not None:
+                    current.pop(entity_id)
+
+        client.history[self.tick] = current
+        if len(client.history) > HISTORY_LENGTH:
+            client.history.pop(min(client.history))
+
+        for index, part in enumerate(parts):
+            header = PACKET_HEADER.pack(SNAPSHOT, self.tick, baseline_tick, server_time, index, len(parts), len(part))
+            self.send(header + b"".join(part), client.address)
+
+    def add_record(self, parts, size, record):
+        # Returns the new size of the last packet, or None once the per-tick packet budget is used up.
+        # Changes that don't fit stay out of this tick's state and are sent in a later tick.
+        if size + len(record) > MAX_PACKET_SIZE and len(parts[-1]) > 0:
+            if len(parts) >= self.max_packets:
+                return None
+            parts.append([])
+            size = PACKET_HEADER.size
+        parts[-1].append(record)
+        return size + len(record)
+
+
+class ReplicationClient(ReplicationPeer):
+    """
+    Receives snapshots from a ReplicationServer, acknowledges them and feeds entity state into the
+    local engine. Float fields are interpolated between snapshots interpolation_delay ms behind the
+    newest one, other fields are set to the newest value.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine, server_address, address=("127.0.0.1", 0), interpolation_delay=100):
+        super().__init__(engine, address)
+
+        self.server_address = server_address
+        self.interpolation_delay = interpolation_delay
+
+        # tick -> {entity id: values}, complete snapshots that can be used as baselines
+        self.states = {}
+        # tick -> [parts received, part count, baseline tick, server time, records by part]
+        self.partial = {}
+        # (server time, {entity id: values}) in tick order, for interpolation
+        self.buffer = []
+
+        self.entity_names = {}
+        self.entity_types = {}
+        self.render_time = None
+        # entity id -> the values last written to the local entity
+        self.applied = {}
+
+        # Called as spawn_handler(name, type_name) for replicated entities that don't exist locally
+        self.spawn_handler = None
+
+        self.latest_tick = 0
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def set_spawn_handler(self, spawn_handler):
+        self.spawn_handler = spawn_handler
+
+    def get_latest_tick(self):
+        return self.latest_tick
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def start(self):
+        super().start()
+        self.send(CLIENT_PACKET.pack(HELLO, 0), self.server_address)
+
+    def update(self):
+        for data, address in self.receive():
+            if address != self.server_address or len(data) < PACKET_HEADER.size:
+                continue
+            self.receive_snapshot(data)
+
+        # Keep saying hello until the first snapshot arrives, the first one may have been lost
+        if self.latest_tick == 0:
+            self.send(CLIENT_PACKET.pack(HELLO, 0), self.server_address)
+
+        self.interpolate()
+
+    def receive_snapshot(self, data):
+        packet_type, tick, baseline_tick, server_time, part, part_count, record_count = PACKET_HEADER.unpack_from(data)
+        if packet_type != SNAPSHOT or tick <= self.latest_tick:
+            return
+
+        partial = self.partial.get(tick)
+        if partial is None:
+            partial = [0, part_count, baseline_tick, server_time, [None] * part_count]
+            self.partial[tick] = partial
+        if partial[4][part] is None:
+            partial[4][part] = (data, record_count)
+            partial[0] += 1
+        if partial[0] < partial[1]:
+            return
+
+        self.partial.pop(tick)
+        baseline = self.states.get(baseline_tick) if baseline_tick != 0 else {}
+        if baseline is None:
+            # The baseline was dropped on our side, wait for a snapshot against a newer ack
+            return
+
+        state = dict(baseline)
+        try:
+            for data, record_count in partial[4]:
+                self.apply_records(state, data, record_count)
+        except RuntimeError as e:
+            self.engine.console.send(f"Dropped snapshot {tick}: {e}")
+            return
+
+        self.states[tick] = state
+        self.latest_tick = tick
+        for old in [t for t in self.states if t < baseline_tick]:
+            self.states.pop(old)
+        for old in [t for t in self.partial if t < tick]:
+            self.partial.pop(old)
+
+        self.buffer.append((server_time, state))
+        if len(self.buffer) > HISTORY_LENGTH:
+            self.buffer.pop(0)
+
+        self.send(CLIENT_PACKET.pack(ACK, tick), self.server_address)
+
+    def apply_records(self, state, data, record_count):
+        offset = PACKET_HEADER.size
+        for _ in range(record_count):
+            entity_id, flags = RECORD_HEADER.unpack_from(data, offset)
+            offset += RECORD_HEADER.size
+
+            if flags & REMOVED:
+                state.pop(entity_id, None)
+                continue
+
+            if flags & FULL:
+                length = NAME_LENGTH.unpack_from(data, offset)[0]
+                offset += NAME_LENGTH.size
+                self.entity_names[entity_id] = data[offset:offset + length].decode()
+                offset += length
+                length = NAME_LENGTH.unpack_from(data, offset)[0]
+                offset += NAME_LENGTH.size
+                self.entity_types[entity_id] = data[offset:offset + length].decode()
+                offset += length
+
+            mask = FIELD_MASK.unpack_from(data, offset)[0]
+            offset += FIELD_MASK.size
+
+            entity = self.get_entity(entity_id)
+            if entity is None:
+                raise RuntimeError(f"Cannot decode replicated entity {self.entity_names.get(entity_id)}.")
+            codec = get_codec(self.codecs, entity)
+            state[entity_id], offset = codec.unpack(data, offset, mask, state.get(entity_id, (0,) * len(codec.names)))
+
+    def get_entity(self, entity_id):
+        name = self.entity_names.get(entity_id)
+        entity = self.engine.get_entity(name)
+        if entity is None and self.spawn_handler is not None:
+            entity = self.spawn_handler(name, self.entity_types.get(entity_id))
+        return entity
+
+    def interpolate(self):
+        if len(self.buffer) == 0:
+            return
+
+        latest_time = self.buffer[-1][0]
+        target = latest_time - self.interpolation_delay
+        if self.render_time is None or abs(self.render_time - target) > self.interpolation_delay:
+            self.render_time = target
+        else:
+            self.render_time = min(self.render_time + self.engine.get_delta_time(), latest_time)
+
+        # Find the two snapshots around the render time
+        before, after = self.buffer[0], self.buffer[-1]
+        for i in range(len(self.buffer) - 1):
+            if self.buffer[i][0] <= self.render_time <= self.buffer[i + 1][0]:
+                before, after = self.buffer[i], self.buffer[i + 1]
+                break
+
+        span = after[0] - before[0]
+        t = min(max((self.render_time - before[0]) / span, 0), 1) if span > 0 else 1
+
+        for entity_id, values in after[1].items():
+            old = before[1].get(entity_id, values)
+            # Unchanged entities share the same tuple between snapshots, skip them once they are applied
+            if old is values and self.applied.get(entity_id) is values:
+                continue
+
+            entity = self.engine.get_entity(self.entity_names.get(entity_id))
+            if entity is None:
+                continue
+
+            codec = get_codec(self.codecs, entity)
+            for i, name in enumerate(codec.names):
+                if codec.formats[i] in INTERPOLATED_FORMATS:
+                    setattr(entity, name, old[i] + (values[i] - old[i]) * t)
+                else:
+                    setattr(entity, name, values[i])
+            self.applied[entity_id] = values if old is values or t == 1 else None
@@ -0,0 +1,103 @@
+from collections import deque
+
+
+class ResolutionController:
+    """
+    Optional dynamic resolution scaling.
+    Watches the processing time of recent frames against the frame budget and steps the screen's
+    render scale down when frames run over budget and back up when there is headroom.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine, min_scale=0.5, max_scale=1.0, step=0.1, window=30):
+        self.engine = engine
+
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.step = step
+
+        # Over budget above the high mark, headroom below the low mark, nothing changes in between
+        self.high_mark = 0.9
+        self.low_mark = 0.6
+        # Frames to wait after a change before judging again, so the new scale is measured first
+        self.cooldown = window
+
+        self.frame_times = deque(maxlen=window)
+        self.frames_since_change = 0
+
+        self._enabled = False
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def enable(self):
+        if self.engine.is_running():
+            raise RuntimeError("Cannot enable dynamic resolution while the game is running.")
+        if not (0 < self.min_scale <= self.max_scale):
+            raise ValueError("Scale bounds must satisfy 0 < min_scale <= max_scale.")
+
+        self.engine.screen.set_max_render_scale(self.max_scale)
+        self._enabled = True
+
+    def disable(self):
+        self._enabled = False
+        if self.engine.screen.surface is not None:
+            self.engine.screen.set_render_scale(min(1.0, self.max_scale))
+
+    def is_enabled(self):
+        return self._enabled
+
+    def set_bounds(self, min_scale, max_scale):
+        if self.engine.is_running():
+            raise RuntimeError("Cannot change the resolution bounds while the game is running.")
+
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+
+    def set_thresholds(self, low_mark, high_mark):
+        if not (0 < low_mark < high_mark):
+            raise ValueError("Thresholds must satisfy 0 < low_mark < high_mark.")
+
+        self.low_mark = low_mark
+        self.high_mark = high_mark
+
+    def get_average_frame_time(self):
+        if len(self.frame_times) == 0:
+            return 0
+        return sum(self.frame_times) / len(self.frame_times)
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def update(self):
+        if not self._enabled:
+            return
+
+        self.frame_times.append(self.engine.get_processing_time())
+        self.frames_since_change += 1
+        if self.frames_since_change < self.cooldown or len(self.frame_times) < self.frame_times.maxlen:
+            return
+
+        load = self.get_average_frame_time() / max(self.engine.target_delta_time, 1)
+        scale = self.engine.screen.get_render_scale()
+
+        if load > self.high_mark and scale > self.min_scale:
+            self.apply(max(scale - self.step, self.min_scale))
+        elif load < self.low_mark and scale < self.max_scale:
+            self.apply(min(scale + self.step, self.max_scale))
+
+    def apply(self, scale):
+        self.engine.screen.set_render_scale(round(scale, 3))
+        self.frames_since_change = 0
+        self.frame_times.clear()
@@ -0,0 +1,125 @@
+import heapq
+from itertools import count
+from engine.constants import TIMER_CLOCK, FRAME_CLOCK
+
+
+class ScheduledCallback:
+    """
+    Handle returned by Scheduler.schedule().
+    Keep it around to cancel the callback or check whether it is still pending.
+    """
+    def __init__(self, callback, due, interval, clock):
+        self.callback = callback
+        self.due = due
+        self.interval = interval
+        self.clock = clock
+
+        self._cancelled = False
+        self._finished = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def is_pending(self):
+        return not self._cancelled and not self._finished
+
+    def is_repeating(self):
+        return self.interval is not None
+
+
+class Scheduler:
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine):
+        self.engine = engine
+
+        # One min-heap per clock, entries are (due, sequence, handle)
+        self.heaps = {TIMER_CLOCK: [], FRAME_CLOCK: []}
+        self.sequence = count()
+
+        # Counts frames the scheduler has been updated on, so the frame clock stops while paused
+        self.frame = 0
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def get_clock_time(self, clock):
+        if clock == TIMER_CLOCK:
+            return self.engine.get_timer_time()
+        elif clock == FRAME_CLOCK:
+            return self.frame
+        raise ValueError("Invalid clock.")
+
+    def get_pending_count(self):
+        return sum(1 for heap in self.heaps.values() for entry in heap if entry[2].is_pending())
+
+    def get_next_due(self, clock=TIMER_CLOCK):
+        heap = self.heaps[clock]
+        while len(heap) > 0 and not heap[0][2].is_pending():
+            heapq.heappop(heap)
+        return heap[0][0] if len(heap) > 0 else None
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def schedule(self, delay, callback, repeat=False, clock=TIMER_CLOCK):
+        if not callable(callback):
+            raise TypeError("Scheduled callback must be callable.")
+        if clock not in self.heaps:
+            raise ValueError("Invalid clock.")
+        if delay < 0:
+            raise ValueError("Delay must not be negative.")
+        if repeat and delay <= 0:
+            raise ValueError("Repeating callbacks must have a delay greater than 0.")
+
+        handle = ScheduledCallback(callback, self.get_clock_time(clock) + delay, delay if repeat else None, clock)
+        heapq.heappush(self.heaps[clock], (handle.due, next(self.sequence), handle))
+        return handle
+
+    def cancel(self, handle):
+        # Cancelled entries are dropped lazily when they reach the top of the heap
+        handle.cancel()
+
+    def clear(self):
+        for clock in self.heaps:
+            for entry in self.heaps[clock]:
+                entry[2].cancel()
+            self.heaps[clock] = []
+
+    def update(self):
+        self.frame += 1
+
+        for clock, heap in self.heaps.items():
+            if len(heap) == 0:
+                continue
+
+            now = self.get_clock_time(clock)
+            while len(heap) > 0 and heap[0][0] <= now:
+                handle = heapq.heappop(heap)[2]
+                if handle.is_cancelled():
+                    continue
+
+                if handle.is_repeating():
+                    # Keep repeating callbacks on their original grid, skipping any missed intervals
+                    handle.due += handle.interval
+                    if handle.due <= now:
+                        handle.due = now + handle.interval
+                    heapq.heappush(heap, (handle.due, next(self.sequence), handle))
+                else:
+                    handle._finished = True
+
+                handle.callback()
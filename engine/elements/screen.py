@@ -1,5 +1,6 @@
 import pygame
-from engine.constants import X, Y, FIT, FILL, STRETCH
+from engine.constants import X, Y, FIT, FILL, STRETCH, SCREEN_RESIZED
+from engine.elements.postprocess import PostProcess
 
 
 class Screen:
@@ -18,11 +19,55 @@ class Screen:
 
         self.window_position = (0, 0)
         self.scale = (1, 1)
-
+        # Size of the screen once scaled into the window, recomputed only when either side changes size
+        self.draw_size = resolution
+
+        # The resolution set by the game, resolution itself is this times the render scale.
+        # Gameplay always works in base resolution coordinates, only the surface drawn into is scaled.
+        self.base_resolution: tuple[int, int] = resolution
+        self.render_scale = 1.0
+        self.max_render_scale = 1.0
+
+        # target is a subsurface of backing_surface, so changing the render scale never reallocates.
+        # With more than one buffer, target is the one currently being rendered into.
+        self.buffer_count = 1
+        self.buffer_index = 0
+        self.backing_surfaces = []
+        self.surfaces = []
+        self.backing_surface = None
+        self.target = None
+        # The game always draws into surface, in base resolution coordinates. At full render scale it is the
+        # target itself, below it is the base resolution canvas that resolve() scales down into the target.
+        self.canvas = None
         self.surface = None
 
+        # Full screen effects applied after the game has drawn and before the screen is scaled to the window
+        self.post_process = PostProcess(engine)
+
     def initialize(self):
-        self.surface = self.engine.core.surface.Surface(self.resolution)
+        self.allocate()
+        self.update_geometry()
+
+    def allocate(self):
+        backing_resolution = (
+            max(round(self.base_resolution[X] * self.max_render_scale), 1),
+            max(round(self.base_resolution[Y] * self.max_render_scale), 1)
+        )
+        self.backing_surfaces = [self.engine.core.surface.Surface(backing_resolution) for _ in range(self.buffer_count)]
+        self.buffer_index = 0
+        self.canvas = None
+        self.create_subsurfaces()
+
+    def create_subsurfaces(self):
+        self.surfaces = [backing.subsurface((0, 0) + self.resolution) for backing in self.backing_surfaces]
+        if self.resolution != self.base_resolution and self.canvas is None:
+            self.canvas = self.engine.core.surface.Surface(self.base_resolution)
+        self.select_buffer()
+
+    def select_buffer(self):
+        self.backing_surface = self.backing_surfaces[self.buffer_index]
+        self.target = self.surfaces[self.buffer_index]
+        self.surface = self.target if self.resolution == self.base_resolution else self.canvas
 
     #
     # ===============================================================
@@ -37,8 +82,61 @@ class Screen:
         if resolution[X] <= 0 or resolution[Y] <= 0:
             raise ValueError("Resolution must be greater than 0.")
 
+        self.base_resolution = resolution
+        self.resolution = resolution
+        self.render_scale = 1.0
+
+        if self.surface is not None:
+            self.allocate()
+            self.update_geometry()
+
+    def set_render_scale(self, render_scale):
+        if type(render_scale) not in [int, float]:
+            raise TypeError("Render scale must be a float or int.")
+
+        if not (0 < render_scale <= self.max_render_scale):
+            raise ValueError("Render scale must be greater than 0 and at most the max render scale.")
+
+        resolution = (
+            max(round(self.base_resolution[X] * render_scale), 1),
+            max(round(self.base_resolution[Y] * render_scale), 1)
+        )
+        self.render_scale = render_scale
+        if resolution == self.resolution:
+            return
+
+        old_resolution = self.resolution
         self.resolution = resolution
 
+        if self.surface is not None:
+            self.create_subsurfaces()
+
+        self.engine.post(SCREEN_RESIZED, (old_resolution, self.resolution))
+
+    def get_render_scale(self):
+        return self.render_scale
+
+    def set_max_render_scale(self, max_render_scale):
+        if self.engine.is_running():
+            raise RuntimeError("Cannot change the max render scale while the game is running.")
+
+        if type(max_render_scale) not in [int, float] or max_render_scale <= 0:
+            raise ValueError("Max render scale must be a number greater than 0.")
+
+        self.max_render_scale = max_render_scale
+
+    def get_base_resolution(self):
+        return self.base_resolution
+
+    def set_buffer_count(self, buffer_count):
+        if self.engine.is_running():
+            raise RuntimeError("Cannot change the buffer count while the game is running.")
+
+        if type(buffer_count) is not int or buffer_count < 1:
+            raise ValueError("Buffer count must be a positive integer.")
+
+        self.buffer_count = buffer_count
+
     def set_fill_mode(self, fill_mode):
         if self.engine.is_running():
             raise RuntimeError("Cannot change fill mode while the game is running.")
@@ -55,10 +153,10 @@ class Screen:
         self.color = color
 
     def get_width(self) -> int:
-        return self.resolution[X]
+        return self.base_resolution[X]
 
     def get_height(self) -> int:
-        return self.resolution[Y]
+        return self.base_resolution[Y]
 
     def get_scale(self) -> tuple[int, int]:
         return self.scale
@@ -69,34 +167,49 @@ class Screen:
     # ===============================================================
     #
 
+    def resolve(self):
+        # Below full render scale, the frame drawn into the canvas is scaled down into the target once,
+        # so post processing, capture and the scale to the window all work on fewer pixels
+        if self.surface is not self.target:
+            pygame.transform.scale(self.surface, self.resolution, self.target)
+
     def draw(self):
+        self.blit_to_window(self.target, self.draw_size, self.window_position)
+
+    def blit_to_window(self, surface, draw_size, window_position):
+        self.engine.window.surface.blit(
+            pygame.transform.scale(surface, draw_size),
+            (window_position[X], window_position[Y])
+        )
+
+    def swap_buffers(self):
+        self.buffer_index = (self.buffer_index + 1) % self.buffer_count
+        self.select_buffer()
+
+    def update_geometry(self):
         window_resolution = self.engine.window.get_resolution()
 
         # center the blit x and y coordinates
 
         if self.fill_mode == FIT:
-            scale_x = min(window_resolution[X] / self.resolution[X], window_resolution[Y] / self.resolution[Y])
+            scale_x = min(window_resolution[X] / self.base_resolution[X], window_resolution[Y] / self.base_resolution[Y])
             scale_y = scale_x
         elif self.fill_mode == FILL:
-            scale_x = max(window_resolution[X] / self.resolution[X], window_resolution[Y] / self.resolution[Y])
+            scale_x = max(window_resolution[X] / self.base_resolution[X], window_resolution[Y] / self.base_resolution[Y])
             scale_y = scale_x
         elif self.fill_mode == STRETCH:
-            scale_x = window_resolution[X] / self.resolution[X]
-            scale_y = window_resolution[Y] / self.resolution[Y]
+            scale_x = window_resolution[X] / self.base_resolution[X]
+            scale_y = window_resolution[Y] / self.base_resolution[Y]
         else:
             raise ValueError("Invalid fill mode.")
 
         # scale the blit x and y coordinates
         center = window_resolution[X] / 2, window_resolution[Y] / 2
-        top_corner = (center[X] - (self.resolution[X] * scale_x) / 2, center[Y] - (self.resolution[Y] * scale_y) / 2)
-        width, height = self.resolution[X] * scale_x, self.resolution[Y] * scale_y
+        top_corner = (center[X] - (self.base_resolution[X] * scale_x) / 2, center[Y] - (self.base_resolution[Y] * scale_y) / 2)
+        width, height = self.base_resolution[X] * scale_x, self.base_resolution[Y] * scale_y
 
         self.window_position, self.scale = top_corner, (scale_x, scale_y)
-
-        self.engine.window.surface.blit(
-            pygame.transform.scale(self.surface, (int(self.resolution[X] * scale_x), int(self.resolution[Y] * scale_y))),
-            (top_corner[X], top_corner[Y])
-        )
+        self.draw_size = (int(width), int(height))
 
     def clear(self):
         self.surface.fill(self.color)
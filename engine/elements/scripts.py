@@ -0,0 +1,345 @@
+from string import Template
+from time import perf_counter
+
+# Instruction fields
+OP = 0
+LINE = 1
+NAME = 2
+ENTRY = 3
+ARGS = 4
+TEMPLATES = 5
+TARGET = 6
+
+# Instruction types
+CALL = 0
+SET = 1
+REPEAT = 2
+END = 3
+WAIT = 4
+
+# Loop stack entries
+START = 0
+REMAINING = 1
+COUNTER = 2
+
+# Command timings
+COUNT = 0
+TOTAL = 1
+LONGEST = 2
+
+
+class Script:
+    """
+    A command script parsed once into a flat list of instructions.
+    Every line is split on whitespace and double quotes group words. A # starts a comment at the beginning
+    of a line or as a word of its own, so arguments like #1 are kept.
+    Backslashes and single quotes are kept as they are, so Windows paths need no escaping.
+    Besides registered commands, scripts understand:
+        set <name> <value...>       sets a variable, used as $name or ${name} in later arguments
+        repeat <count> [as <name>]  repeats everything up to the matching `end`, counting in <name>
+        end
+        wait <frames>               lets the given number of frames pass before continuing
+    Commands are resolved when the script is compiled; arguments without a $ are never touched again.
+    """
+    def __init__(self, name, instructions):
+        self.name = name
+        self.instructions = instructions
+
+    def get_length(self):
+        return len(self.instructions)
+
+    @staticmethod
+    def substitute(value, templates, variables):
+        if templates is None:
+            return value
+        if isinstance(templates, Template):
+            return templates.safe_substitute(variables)
+        return [value[i] if template is None else template.safe_substitute(variables) for i, template in enumerate(templates)]
+
+    @staticmethod
+    def split_line(line):
+        tokens = []
+        token = []
+        in_token = False
+        quoted = False
+
+        for index, char in enumerate(line):
+            if quoted:
+                if char == '"':
+                    quoted = False
+                else:
+                    token.append(char)
+            elif char == '"':
+                quoted = True
+                in_token = True
+            elif char.isspace():
+                if in_token:
+                    tokens.append("".join(token))
+                    token = []
+                    in_token = False
+            elif char == "#" and not in_token and (len(tokens) == 0 or line[index + 1:index + 2].strip() == ""):
+                break
+            else:
+                token.append(char)
+                in_token = True
+
+        if quoted:
+            raise ValueError("No closing quotation")
+        if in_token:
+            tokens.append("".join(token))
+        return tokens
+
+    @staticmethod
+    def compile_templates(args):
+        if not any("$" in arg for arg in args):
+            return None
+        return [Template(arg) if "$" in arg else None for arg in args]
+
+    @classmethod
+    def compile(cls, commands, text, name="script"):
+        instructions = []
+        loops = []
+
+        for line_number, line in enumerate(text.splitlines(), 1):
+            try:
+                tokens = cls.split_line(line)
+            except ValueError as e:
+                raise ValueError(f"{name}:{line_number}: {e}")
+            if len(tokens) == 0:
+                continue
+
+            keyword = tokens[0].lower()
+            args = tokens[1:]
+
+            if keyword == "set":
+                if len(args) < 1:
+                    raise ValueError(f"{name}:{line_number}: Usage: set <name> <value...>")
+                value = " ".join(args[1:])
+                template = Template(value) if "$" in value else None
+                instructions.append((SET, line_number, args[0], None, value, template, None))
+            elif keyword == "repeat":
+                if len(args) not in [1, 3] or (len(args) == 3 and args[1].lower() != "as"):
+                    raise ValueError(f"{name}:{line_number}: Usage: repeat <count> [as <name>]")
+                counter = args[2] if len(args) == 3 else None
+                loops.append(len(instructions))
+                instructions.append([REPEAT, line_number, counter, None, args[:1], cls.compile_templates(args[:1]), None])
+            elif keyword == "end":
+                if len(loops) == 0:
+                    raise ValueError(f"{name}:{line_number}: end without repeat")
+                start = loops.pop()
+                # The repeat jumps past its end once the count runs out
+                instructions[start][TARGET] = len(instructions) + 1
+                instructions[start] = tuple(instructions[start])
+                instructions.append((END, line_number, None, None, None, None, start))
+            elif keyword == "wait":
+                if len(args) != 1:
+                    raise ValueError(f"{name}:{line_number}: Usage: wait <frames>")
+                instructions.append((WAIT, line_number, None, None, args, cls.compile_templates(args), None))
+            else:
+                entry = commands.get_command(keyword)
+                if entry is None:
+                    raise ValueError(f"{name}:{line_number}: Unknown command: {keyword}")
+                instructions.append((CALL, line_number, keyword, entry, args, cls.compile_templates(args), None))
+
+        if len(loops) > 0:
+            raise ValueError(f"{name}: repeat on line {instructions[loops[-1]][LINE]} has no end")
+
+        return cls(name, instructions)
+
+
+class ScriptRun:
+    """
+    Execution state of a script: where it is, its variables and how long each command took.
+    """
+    def __init__(self, script, variables=None, on_complete=None):
+        self.script = script
+        self.variables = dict(variables or {})
+        self.on_complete = on_complete
+
+        self.position = 0
+        self.loops = []
+        self.wait_frames = 0
+
+        self.executed = 0
+        self.errors = 0
+        self.time_spent = 0.0
+        # command name -> [calls, total ms, longest ms]
+        self.timings = {}
+
+        self._finished = False
+        self._cancelled = False
+
+    def is_finished(self):
+        return self._finished
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        self._cancelled = True
+        self._finished = True
+
+    def get_progress(self):
+        return self.position / max(self.script.get_length(), 1)
+
+    def get_timings(self):
+        # Slowest commands first, by total time
+        return sorted(((name, timing[COUNT], timing[TOTAL], timing[LONGEST]) for name, timing in self.timings.items()), key=lambda timing: -timing[2])
+
+    def step(self, commands, deadline):
+        # Runs instructions until the script ends, waits for a frame, or perf_counter() passes deadline
+        if self.wait_frames > 0:
+            self.wait_frames -= 1
+            return
+
+        instructions = self.script.instructions
+        variables = self.variables
+        timings = self.timings
+        call = commands.call
+        send = commands.console.send
+
+        start = perf_counter()
+        now = start
+        while self.position < len(instructions) and not self._cancelled:
+            instruction = instructions[self.position]
+            self.position += 1
+            op = instruction[OP]
+
+            try:
+                if op == CALL:
+                    args = Script.substitute(instruction[ARGS], instruction[TEMPLATES], variables)
+                    call(instruction[ENTRY], list(args))
+                    after = perf_counter()
+                    duration = (after - now) * 1000
+                    timing = timings.get(instruction[NAME])
+                    if timing is None:
+                        timing = [0, 0.0, 0.0]
+                        timings[instruction[NAME]] = timing
+                    timing[COUNT] += 1
+                    timing[TOTAL] += duration
+                    if duration > timing[LONGEST]:
+                        timing[LONGEST] = duration
+                    self.executed += 1
+                    now = after
+                elif op == SET:
+                    variables[instruction[NAME]] = Script.substitute(instruction[ARGS], instruction[TEMPLATES], variables)
+                elif op == REPEAT:
+                    count = int(Script.substitute(instruction[ARGS], instruction[TEMPLATES], variables)[0])
+                    if count <= 0:
+                        self.position = instruction[TARGET]
+                    else:
+                        self.loops.append([self.position - 1, count, 0])
+                        if instruction[NAME] is not None:
+                            variables[instruction[NAME]] = "0"
+                elif op == END:
+                    loop = self.loops[-1]
+                    loop[REMAINING] -= 1
+                    if loop[REMAINING] > 0:
+                        loop[COUNTER] += 1
+                        counter = instructions[loop[START]][NAME]
+                        if counter is not None:
+                            variables[counter] = str(loop[COUNTER])
+                        self.position = loop[START] + 1
+                    else:
+                        self.loops.pop()
+                elif op == WAIT:
+                    frames = int(Script.substitute(instruction[ARGS], instruction[TEMPLATES], variables)[0])
+                    if frames > 0:
+                        # This frame counts as the first one waited
+                        self.wait_frames = frames - 1
+                        break
+            except Exception as e:
+                self.errors += 1
+                send(f"{self.script.name}:{instruction[LINE]}: {e}", source="script")
+                if op != CALL:
+                    # A broken loop or wait leaves the script in no state to continue
+                    self._cancelled = True
+
+            now = perf_counter()
+            if now >= deadline:
+                break
+
+        self.time_spent += (perf_counter() - start) * 1000
+        if self.position >= len(instructions) or self._cancelled:
+            self._finished = True
+
+
+class ScriptRunner:
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine, budget_share=0.25):
+        self.engine = engine
+        # Share of the target frame time scripts may use each frame, the rest is left for the game
+        self.budget_share = budget_share
+
+        self.runs = []
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def set_budget_share(self, budget_share):
+        if type(budget_share) not in [int, float] or not (0 < budget_share <= 1):
+            raise ValueError("Budget share must be between 0 and 1.")
+        self.budget_share = budget_share
+
+    def get_budget(self):
+        # Milliseconds per frame, at least one instruction always runs so scripts can't stall completely
+        return self.engine.target_delta_time * self.budget_share
+
+    def get_runs(self):
+        return list(self.runs)
+
+    def has_runs(self):
+        return len(self.runs) > 0
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def compile(self, text, name="script"):
+        return Script.compile(self.engine.commands, text, name)
+
+    def compile_file(self, path):
+        with open(path, "r") as file:
+            return self.compile(file.read(), path)
+
+    def run(self, script, variables=None, on_complete=None):
+        if type(script) is str:
+            script = self.compile(script)
+
+        script_run = ScriptRun(script, variables, on_complete)
+        self.runs.append(script_run)
+        return script_run
+
+    def stop(self):
+        for script_run in self.runs:
+            script_run.cancel()
+
+    def update(self):
+        if len(self.runs) == 0:
+            return
+
+        deadline = perf_counter() + self.get_budget() / 1000
+        # Scripts run one after another, the first one gets the budget first
+        for script_run in tuple(self.runs):
+            # Cancelled runs are finished too, so stopped scripts still report what they did
+            if not script_run.is_finished():
+                script_run.step(self.engine.commands, deadline)
+
+            if script_run.is_finished():
+                self.runs.remove(script_run)
+                if script_run.on_complete is not None:
+                    script_run.on_complete(script_run)
+
+            if perf_counter() >= deadline:
+                break
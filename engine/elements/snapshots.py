@@ -0,0 +1,169 @@
+import struct
+from array import array
+from collections import deque
+from itertools import repeat
+from operator import itemgetter, setitem, is_
+
+NAME = 0
+FORMAT = 1
+STATES = 2
+GETTER = 3
+
+
+class SnapshotLayout:
+    """
+    The binary layout of one snapshot, stored by column: one run of values per (field, format) pair,
+    covering every entity that declares that field. A column is read from and written to the entities'
+    __dict__s with map(), so packing and unpacking stay in C instead of looping per entity in Python.
+    """
+    def __init__(self, entities):
+        # The entities themselves, not their names: an entity replaced under the same name needs a new layout
+        self.entities = tuple(entities.values())
+
+        # (name, format) -> list of entity __dict__s, in entity order
+        columns = {}
+        for entity in entities.values():
+            for name, field_format in entity.STATE_FIELDS:
+                columns.setdefault((name, field_format), []).append(entity.__dict__)
+
+        # (name, format, states, getter)
+        self.columns = [(name, field_format, states, itemgetter(name)) for (name, field_format), states in columns.items()]
+        self.struct = struct.Struct("<" + "".join(f"{len(column[STATES])}{column[FORMAT]}" for column in self.columns))
+        self.size = self.struct.size
+
+    def matches(self, entities):
+        return len(self.entities) == len(entities) and all(map(is_, self.entities, entities.values()))
+
+
+class Snapshots:
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine, capacity=120):
+        self.engine = engine
+        self.capacity = capacity
+
+        self.layout = None
+        self.buffer = bytearray()
+        # Frame number stored in each slot of the ring, -1 when the slot is empty
+        self.frames = array("q", [-1] * capacity)
+        self.head = 0
+        self.count = 0
+
+        self._recording = False
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def set_capacity(self, capacity):
+        if type(capacity) is not int:
+            raise TypeError("Snapshot capacity must be an integer.")
+        if capacity <= 0:
+            raise ValueError("Snapshot capacity must be greater than 0.")
+
+        self.capacity = capacity
+        self.layout = None
+        self.clear()
+
+    def get_capacity(self):
+        return self.capacity
+
+    def get_count(self):
+        return self.count
+
+    def get_frames(self):
+        # Oldest to newest
+        return [self.frames[(self.head - self.count + i) % self.capacity] for i in range(self.count)]
+
+    def get_snapshot_size(self):
+        return self.layout.size if self.layout is not None else 0
+
+    def is_recording(self):
+        return self._recording
+
+    def start_recording(self):
+        self._recording = True
+
+    def stop_recording(self):
+        self._recording = False
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def clear(self):
+        self.frames = array("q", [-1] * self.capacity)
+        self.head = 0
+        self.count = 0
+
+    def _check_layout(self):
+        entities = self.engine.entities
+        if self.layout is not None and self.layout.matches(entities):
+            return
+
+        # Entities were added or removed, older snapshots no longer line up with the world
+        self.layout = SnapshotLayout(entities)
+        self.buffer = bytearray(self.layout.size * self.capacity)
+        self.clear()
+
+    def pack(self):
+        self._check_layout()
+        values = []
+        extend = values.extend
+        for column in self.layout.columns:
+            extend(map(column[GETTER], column[STATES]))
+        return values
+
+    def capture(self):
+        values = self.pack()
+
+        self.layout.struct.pack_into(self.buffer, self.head * self.layout.size, *values)
+        self.frames[self.head] = self.engine.get_frame_count()
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def restore(self, frames_back=0):
+        # frames_back=0 restores the most recent snapshot
+        if not (0 <= frames_back < self.count):
+            raise IndexError("No snapshot that far back.")
+        if not self.layout.matches(self.engine.entities):
+            raise RuntimeError("Entities have changed since the snapshot was taken.")
+
+        slot = (self.head - 1 - frames_back) % self.capacity
+        self._unpack(self.layout.struct.unpack_from(self.buffer, slot * self.layout.size))
+        return self.frames[slot]
+
+    def rewind(self, frames_back):
+        # Restore an older snapshot and drop everything newer than it
+        frame = self.restore(frames_back)
+        self.head = (self.head - frames_back) % self.capacity
+        self.count -= frames_back
+        return frame
+
+    def save(self):
+        values = self.pack()
+        return self.layout.struct.pack(*values)
+
+    def load(self, data):
+        self._check_layout()
+        if len(data) != self.layout.size:
+            raise ValueError("Snapshot does not match the current entities.")
+        self._unpack(self.layout.struct.unpack(data))
+
+    def _unpack(self, values):
+        index = 0
+        for column in self.layout.columns:
+            states = column[STATES]
+            end = index + len(states)
+            # deque(maxlen=0) just drains the map, assigning every value of the column
+            deque(map(setitem, states, repeat(column[NAME]), values[index:end]), maxlen=0)
+            index = end
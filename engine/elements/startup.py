@@ -0,0 +1,47 @@
+from time import perf_counter
+
+NAME = 0
+DURATION = 1
+
+
+class StartupTimeline:
+    """
+    Times engine startup, from the PyEngine constructor to the end of the first frame.
+    Each mark() closes a phase: the time since the previous mark is attributed to it.
+    """
+    def __init__(self):
+        self.start = perf_counter()
+        self.last = self.start
+        # (name, milliseconds) in the order the phases happened
+        self.phases = []
+
+        self._finished = False
+
+    def is_finished(self):
+        return self._finished
+
+    def get_phases(self):
+        return dict(self.phases)
+
+    def get_total(self):
+        return (self.last - self.start) * 1000
+
+    def mark(self, name):
+        if self._finished:
+            return
+
+        now = perf_counter()
+        self.phases.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    def finish(self, name="first frame"):
+        self.mark(name)
+        self._finished = True
+
+    def format(self, width=30):
+        total = max(self.get_total(), 0.001)
+        lines = [f"Startup took {total:.1f} ms"]
+        for name, duration in self.phases:
+            bar = "#" * round(duration / total * width)
+            lines.append(f"{name.ljust(14, ' ')}  {duration:8.2f} ms  {bar}")
+        return lines
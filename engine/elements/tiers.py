@@ -0,0 +1,130 @@
+import inspect
+
+# Async update entries
+ENTITY = 0
+TASK = 1
+DELTA = 2
+
+
+class UpdateTiers:
+    """
+    Decides which entities get update() called each frame.
+    Entities with an update rate of 1 run every frame. An entity with rate N runs every Nth frame
+    with the delta accumulated since its last update; entities of the same rate are spread over N
+    phase buckets so their cost is staggered across frames. Sleeping entities are in no bucket at all.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine):
+        self.engine = engine
+
+        # Buckets are dicts of id(entity) -> entity, so removal is O(1) and iteration order is stable
+        self.every_frame = {}
+        # rate -> ([bucket per phase], [accumulated delta per phase])
+        self.groups = {}
+        # id(entity) -> (rate, phase) for entities that are in a bucket
+        self.locations = {}
+
+        # id(entity) -> [entity, task, delta] for entities whose async update() is running or just finished.
+        # An entity never has two updates in flight, frames it misses meanwhile add to its next delta.
+        self.async_updates = {}
+
+        self.frame = 0
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def get_active_count(self):
+        return len(self.locations)
+
+    def get_bucket_sizes(self, rate):
+        if rate not in self.groups:
+            return []
+        return [len(bucket) for bucket in self.groups[rate][0]]
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def add(self, entity):
+        if entity.is_asleep() or id(entity) in self.locations:
+            return
+
+        rate = entity.get_update_rate()
+        if rate == 1:
+            self.every_frame[id(entity)] = entity
+            self.locations[id(entity)] = (1, 0)
+            return
+
+        group = self.groups.get(rate)
+        if group is None:
+            group = ([{} for _ in range(rate)], [0] * rate)
+            self.groups[rate] = group
+
+        # Stagger: put the entity in whichever phase currently has the fewest entities
+        buckets = group[0]
+        phase = min(range(rate), key=lambda p: len(buckets[p]))
+        buckets[phase][id(entity)] = entity
+        self.locations[id(entity)] = (rate, phase)
+
+    def remove(self, entity):
+        location = self.locations.pop(id(entity), None)
+        if location is None:
+            return
+
+        rate, phase = location
+        if rate == 1:
+            self.every_frame.pop(id(entity))
+        else:
+            self.groups[rate][0][phase].pop(id(entity))
+
+    def move(self, entity):
+        self.remove(entity)
+        self.add(entity)
+
+    def forget(self, entity):
+        # Called when the entity leaves the engine, an update that is still running is left to finish
+        self.remove(entity)
+        self.async_updates.pop(id(entity), None)
+
+    def run_update(self, entity, delta):
+        entry = self.async_updates.get(id(entity)) if self.async_updates else None
+        if entry is not None and entry[ENTITY] is entity:
+            if not entry[TASK].done():
+                entry[DELTA] += delta
+                return
+            delta += entry[DELTA]
+            del self.async_updates[id(entity)]
+
+        result = entity.update(delta)
+        # async def update() methods are run as tasks between frames
+        if result is not None and inspect.iscoroutine(result):
+            self.async_updates[id(entity)] = [entity, self.engine.spawn(result), 0]
+
+    def update(self, delta):
+        run_update = self.run_update
+
+        for entity in tuple(self.every_frame.values()):
+            run_update(entity, delta)
+
+        for rate, (buckets, accumulated) in tuple(self.groups.items()):
+            for phase in range(rate):
+                accumulated[phase] += delta
+
+            phase = self.frame % rate
+            bucket_delta = accumulated[phase]
+            accumulated[phase] = 0
+            for entity in tuple(buckets[phase].values()):
+                run_update(entity, bucket_delta)
+
+        self.frame += 1
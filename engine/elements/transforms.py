@@ -0,0 +1,142 @@
+import pygame
+from collections import OrderedDict
+
+IMAGE = 0
+SURFACE = 1
+
+
+class TransformCache:
+    """
+    Caches rotated, scaled and faded copies of sprite images.
+    Keys are (image, quantized angle, rounded scale, alpha); the least recently used entries are
+    evicted once the cache is full. Rotations prebaked with prebake() are kept for good, and an image
+    that keeps missing at new angles is prebaked automatically, so spinning sprites stop churning the LRU.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, engine, capacity=512, angle_step=360 / 64, scale_precision=2, auto_prebake_misses=32):
+        self.engine = engine
+        self.capacity = capacity
+        # 64 angles per turn, finer steps multiply the number of entries a spinning sprite cycles through
+        self.angle_step = angle_step
+        self.scale_precision = scale_precision
+        # Rotated misses after which an image gets all of its rotations prebaked, 0 turns this off
+        self.auto_prebake_misses = auto_prebake_misses
+
+        # key -> (source image, transformed surface), the image is kept so a reused id() can't match
+        self.cache = OrderedDict()
+        self.baked = {}
+        # id(image) -> angle step for images with prebaked rotations
+        self.image_steps = {}
+        # id(image) -> misses at a non-zero angle, for images without prebaked rotations
+        self.rotation_misses = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    #
+    # ===============================================================
+    # ======================== GETTERS/SETTERS ======================
+    # ===============================================================
+    #
+
+    def set_capacity(self, capacity):
+        if type(capacity) is not int or capacity < 0:
+            raise ValueError("Capacity must be a non-negative integer.")
+
+        self.capacity = capacity
+        while len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+
+    def get_hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def get_size(self):
+        return len(self.cache) + len(self.baked)
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def get_key(self, image, rotation, scale, alpha):
+        step = self.image_steps.get(id(image), self.angle_step)
+        angle = round((rotation % 360) / step) * step % 360
+        return id(image), angle, round(scale, self.scale_precision), alpha
+
+    def get(self, image, rotation=0, scale=1.0, alpha=None):
+        if alpha is not None and alpha >= 255:
+            alpha = None
+
+        key = self.get_key(image, rotation, scale, alpha)
+        if key[1] == 0 and key[2] == 1 and alpha is None:
+            return image
+
+        entry = self.baked.get(key)
+        if entry is None:
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+
+        if entry is not None and entry[IMAGE] is image:
+            self.hits += 1
+            return entry[SURFACE]
+
+        self.misses += 1
+        if key[1] != 0 and self.auto_prebake_misses > 0 and key[0] not in self.image_steps:
+            misses = self.rotation_misses.get(key[0], 0) + 1
+            self.rotation_misses[key[0]] = misses
+            if misses >= self.auto_prebake_misses:
+                self.prebake(image, round(360 / self.angle_step), key[2], alpha)
+                entry = self.baked.get(self.get_key(image, rotation, scale, alpha))
+                if entry is not None:
+                    return entry[SURFACE]
+
+        surface = self.transform(image, key[1], key[2], alpha)
+        if self.capacity > 0:
+            self.cache[key] = (image, surface)
+            if len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)
+        return surface
+
+    @staticmethod
+    def transform(image, angle, scale, alpha):
+        if angle != 0 or scale != 1:
+            surface = pygame.transform.rotozoom(image, angle, scale)
+        else:
+            surface = image.copy()
+
+        if alpha is not None:
+            surface.set_alpha(alpha)
+        return surface
+
+    def prebake(self, image, steps, scale=1.0, alpha=None):
+        # Renders all `steps` rotations up front, rotations of this image are then snapped to them
+        if type(steps) is not int or steps <= 0:
+            raise ValueError("Steps must be a positive integer.")
+
+        self.image_steps[id(image)] = 360 / steps
+        self.rotation_misses.pop(id(image), None)
+        for i in range(steps):
+            key = self.get_key(image, i * 360 / steps, scale, alpha)
+            self.baked[key] = (image, self.transform(image, key[1], key[2], alpha))
+
+    def forget(self, image):
+        self.image_steps.pop(id(image), None)
+        self.rotation_misses.pop(id(image), None)
+        for store in [self.cache, self.baked]:
+            for key in [key for key, entry in store.items() if entry[IMAGE] is image]:
+                store.pop(key)
+
+    def clear(self):
+        self.cache.clear()
+        self.baked.clear()
+        self.image_steps.clear()
+        self.rotation_misses.clear()
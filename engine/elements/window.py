@@ -19,10 +19,14 @@ class Window:
         self.aspect_ratio = None
         self.surface = None
 
+        # Resize events are collected here and applied once the user stops dragging
+        self.pending_resolution = None
+        self.last_resize_event_time = 0
+        self.resize_debounce_time = 100  # Milliseconds
+
     def initialize(self):
         self.engine.core.display.set_caption(self.title)
-        self.surface = self.engine.core.display.set_mode(self.resolution, pygame.RESIZABLE if self.window_resizable else 0)
-        self.resize(self.resolution)
+        self.resize(self.resolution, force=True)
 
     #
     # ===============================================================
@@ -40,13 +44,9 @@ class Window:
         if resolution[X] <= 0 or resolution[Y] <= 0:
             raise ValueError("Resolution must be greater than 0.")
 
-        self.resolution = resolution
-        self.resize(self.resolution)
+        self.resize(resolution)
 
     def get_resolution(self):
-        if self.engine.core.display.get_window_size() != self.resolution:
-            self.resolution = self.engine.core.display.get_window_size()
-
         return self.resolution
 
     def set_title(self, title):
@@ -60,15 +60,21 @@ class Window:
         if aspect_ratio is not None and type(aspect_ratio) not in [int, float]:
             raise TypeError("Aspect ratio must be a float or int.")
 
-        self.aspect_ratio = aspect_ratio
-        self.lock_aspect_ratio(self.aspect_ratio)
+        self.lock_aspect_ratio(aspect_ratio)
 
     def set_resizable(self, resizable):
         if type(resizable) is not bool:
             raise TypeError("Window resizable must be a boolean.")
 
         self.window_resizable = resizable
-        self.resize(self.resolution)
+        # The window flags changed, so the display has to be recreated if it exists
+        self.resize(self.resolution, force=self.surface is not None)
+
+    def set_resize_debounce_time(self, ms):
+        if type(ms) not in [int, float] or ms < 0:
+            raise ValueError("Resize debounce time must be a number of milliseconds.")
+
+        self.resize_debounce_time = ms
 
     #
     # ===============================================================
@@ -76,31 +82,60 @@ class Window:
     # ===============================================================
     #
 
-    def resize(self, resolution):
-        self.resolution = resolution
-
+    def resize(self, resolution, force=False):
         if not self.window_resizable:
-            self.resolution = self.locked_resolution
+            resolution = self.locked_resolution
         else:
-            self.lock_aspect_ratio(self.aspect_ratio)
+            resolution = self.fit_aspect_ratio(resolution)
 
-        self.engine.core.display.set_mode(self.resolution, pygame.RESIZABLE if self.window_resizable else 0)
+        changed = resolution != self.resolution
+        self.resolution = resolution
+
+        # The display is created in initialize(), until then only remember the resolution
+        if self.surface is None and not force:
+            return
+
+        # set_mode recreates the display surface, so only call it when the window is actually wrong
+        if force or self.engine.core.display.get_window_size() != self.resolution:
+            # The render thread may be presenting a frame onto the old display surface
+            with self.engine.renderer.lock:
+                self.surface = self.engine.core.display.set_mode(self.resolution, pygame.RESIZABLE if self.window_resizable else 0)
+
+        if changed and self.engine.screen.surface is not None:
+            self.engine.screen.update_geometry()
+
+    def fit_aspect_ratio(self, resolution):
+        if self.aspect_ratio is None or resolution[X] / resolution[Y] == self.aspect_ratio:
+            return resolution
+
+        if resolution[X] / resolution[Y] > self.aspect_ratio:
+            # Width is too big
+            return int(resolution[Y] * self.aspect_ratio), resolution[Y]
+        # Height is too big
+        return resolution[X], int(resolution[X] / self.aspect_ratio)
 
     def lock_aspect_ratio(self, aspect_ratio):
-        # Check if the aspect ratio is correct
-        if aspect_ratio is not None and self.resolution[X] / self.resolution[Y] != aspect_ratio:
-            # Calculate the new resolution
-            if self.resolution[X] / self.resolution[Y] > aspect_ratio:
-                # Width is too big
-                self.resolution = (int(self.resolution[Y] * aspect_ratio), self.resolution[Y])
-            else:
-                # Height is too big
-                self.resolution = (self.resolution[X], int(self.resolution[X] / aspect_ratio))
-
-            self.resize(self.resolution)
+        self.aspect_ratio = aspect_ratio
+        self.resize(self.resolution)
+
+    def handle_event(self, event):
+        if event.type == pygame.VIDEORESIZE:
+            self.pending_resolution = tuple(event.size)
+        elif event.type == pygame.WINDOWSIZECHANGED:
+            self.pending_resolution = (event.x, event.y)
+        else:
+            return
+
+        self.last_resize_event_time = self.engine.get_system_time()
 
     def update(self):
-        if self.engine.core.display.get_window_size() != self.resolution:
-            self.resolution = self.engine.core.display.get_window_size()
+        if self.pending_resolution is None:
+            return
+
+        if self.engine.get_system_time() - self.last_resize_event_time < self.resize_debounce_time:
+            return
 
-        self.lock_aspect_ratio(self.aspect_ratio)
\ No newline at end of file
+        resolution = self.pending_resolution
+        self.pending_resolution = None
+        if resolution[X] > 0 and resolution[Y] > 0:
+            self.resize(resolution)
@@ -1,16 +1,34 @@
 import pygame
 import math
+import asyncio
 from engine.elements.screen import Screen
 from engine.elements.window import Window
 from engine.elements.inputs import Inputs
 from engine.elements.console import Console
 from engine.elements.commands import Commands
+from engine.elements.messages import MessageBus
+from engine.elements.scheduler import Scheduler
+from engine.elements.jobs import JobQueue
+from engine.elements.snapshots import Snapshots
+from engine.elements.resolution import ResolutionController
+from engine.elements.metrics import Metrics
+from engine.elements.memory import MemoryTracker
+from engine.elements.tiers import UpdateTiers
+from engine.elements.capture import FrameCapture
+from engine.elements.transforms import TransformCache
+from engine.elements.renderer import RenderThread
+from engine.elements.scripts import ScriptRunner
+from engine.elements.startup import StartupTimeline
+from engine.elements.queries import EntityIndex, TYPE, TAG, COMPONENT
 from engine.constants import *
 from time import time
 import os
 import signal
 
 
+RESIZE_EVENTS = (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED)
+
+
 def hex_to_rgb(hex_val):
     hex_val = hex_val.lstrip('#')
     hlen = len(hex_val)
@@ -18,6 +36,8 @@ def hex_to_rgb(hex_val):
 
 
 class PyEngine:
+    # Set by the simulation farm in worker processes, engines created while it is set run headless
+    farm_run = None
 
     #
     # ===============================================================
@@ -26,10 +46,9 @@ class PyEngine:
     #
 
     def __init__(self):
+        self.startup = StartupTimeline()
         self.core = pygame
 
-        os.system("cls" if os.name == "nt" else "clear")
-
         # Private variables, set and accessed through methods
         self.running = False
         self.paused = False
@@ -37,7 +56,7 @@ class PyEngine:
         self.ms_per_frame = []
         self.resolution: tuple[int, int] = (800, 600)
         self.timer_reset_time = 0
-        self.time_pause_started = 0
+        self.time_pause_started = None
         self.timer_paused_time = 0
 
         self.start_time = 0
@@ -56,12 +75,47 @@ class PyEngine:
         self.inputs = Inputs(self)
         self.console = Console(self)
         self.commands = Commands(self)
+        self.messages = MessageBus(self)
+        self.scheduler = Scheduler(self)
+        self.jobs = JobQueue(self)
+        self.snapshots = Snapshots(self)
+        self.resolution_controller = ResolutionController(self)
+        self.metrics = Metrics(self)
+        self.memory = MemoryTracker(self)
+        self.update_tiers = UpdateTiers(self)
+        self.capture = FrameCapture(self)
+        self.transforms = TransformCache(self)
+        self.renderer = RenderThread(self)
+        self.scripts = ScriptRunner(self)
+        self.entity_index = EntityIndex(self)
+
+        # Fonts are loaded on first use, see get_font()
+        self.fonts = {}
 
-        self.broadcasts = [self]
         self.entities = {}
+        self.messages.subscribe(BROADCAST, self.broadcast_recieved)
+
+        # Headless engines have no window or console and run on a virtual clock as fast as possible
+        self.headless = False
+        self.virtual_time = 0
+        self.finished = False
+        self.error = None
+        self.results = {}
+        # Seed of the run, set by the simulation farm. Emitters created without a seed derive theirs from it
+        self.seed = None
+
+        # Set while run_async() is driving the frame loop
+        self.loop = None
+        self.tasks = set()
 
         self.__debug = False
 
+        if self.farm_run is not None:
+            self.seed = self.farm_run.seed
+            self.enable_headless()
+
+        self.startup.mark("elements")
+
     #
     # ===============================================================
     # ======================== GETTERS/SETTERS ======================
@@ -71,6 +125,22 @@ class PyEngine:
     def get_frame_count(self) -> int:
         return self.frame_count
 
+    def get_font(self, name, size):
+        # The font module is only initialized once something actually draws text
+        font = self.fonts.get((name, size))
+        if font is None:
+            if not self.core.font.get_init():
+                self.core.font.init()
+            font = self.core.font.SysFont(name, size)
+            self.fonts[(name, size)] = font
+        return font
+
+    def get_mixer(self):
+        # Audio is only initialized for games that play sound
+        if not self.core.mixer.get_init():
+            self.core.mixer.init()
+        return self.core.mixer
+
     def get_target_time(self):
         # find the time that it is currently supposed to be by getting number of frames that have passed
         # and multiplying that by the target delta time
@@ -108,10 +178,14 @@ class PyEngine:
         return self.running
 
     def is_exited(self) -> bool:
-        # Check if any of the event types are quit events
-        if self.core.QUIT in [event.type for event in self.core.event.get()]:
-            return True
-        return False
+        # Drain the event queue, handing resize events to the window and checking for quit events
+        exited = False
+        for event in self.core.event.get():
+            if event.type == self.core.QUIT:
+                exited = True
+            elif event.type in RESIZE_EVENTS:
+                self.window.handle_event(event)
+        return exited
 
     def get_timer_time(self):  # Milliseconds
         currently_paused_time = 0
@@ -122,8 +196,9 @@ class PyEngine:
     def get_time(self):  # Milliseconds
         return self.get_system_time() - self.start_time
 
-    @staticmethod
-    def get_system_time():
+    def get_system_time(self):
+        if self.headless:
+            return self.virtual_time
         return time() * 1000
 
     def get_delta_time(self):
@@ -135,6 +210,44 @@ class PyEngine:
     def get_processing_time(self):
         return self.processing_time
 
+    def enable_headless(self):
+        if self.is_running():
+            raise RuntimeError("Cannot enable headless mode while the engine is running.")
+
+        # The dummy drivers let the display and mixer initialize without a real window or sound card
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+        self.headless = True
+        self.console.disable()
+        self.console.log.set_echo(False)
+
+    def is_headless(self):
+        return self.headless
+
+    def enable_pipelined_rendering(self):
+        # Scaling and flipping move to a render thread that presents frame N while frame N+1 is simulated.
+        # Some platforms only allow the display to be flipped from the main thread, so this is opt-in.
+        self.renderer.enable()
+
+    def is_pipelined_rendering_enabled(self):
+        return self.renderer.is_enabled()
+
+    def set_result(self, key, value):
+        # Results are collected by the simulation farm when the run finishes
+        self.results[key] = value
+
+    def get_results(self):
+        return self.results
+
+    def set_seed(self, seed):
+        if seed is not None and type(seed) is not int:
+            raise TypeError("Seed must be an integer or None.")
+        self.seed = seed
+
+    def get_seed(self):
+        return self.seed
+
     def enable_debug_mode(self):
         self.__debug = True
 
@@ -170,11 +283,37 @@ class PyEngine:
         self.time_pause_started = None
 
     def add_listener(self, listener):
-        self.broadcasts.append(listener)
+        self.messages.subscribe(BROADCAST, listener.broadcast_recieved)
+
+    def remove_listener(self, listener):
+        self.messages.unsubscribe(BROADCAST, listener.broadcast_recieved)
 
     def broadcast(self, message):
-        for broadcast in self.broadcasts:
-            broadcast.broadcast_recieved(message)
+        # Broadcasts are queued and delivered with the rest of the messages at the start of the next frame
+        self.messages.post(BROADCAST, message)
+
+    def subscribe(self, topic, callback):
+        self.messages.subscribe(topic, callback)
+
+    def unsubscribe(self, topic, callback):
+        self.messages.unsubscribe(topic, callback)
+
+    def post(self, topic, message, coalesce=False):
+        self.messages.post(topic, message, coalesce)
+
+    def schedule(self, delay, callback, repeat=False):
+        # delay is in milliseconds of timer time, so it stops while the engine is paused
+        return self.scheduler.schedule(delay, callback, repeat, TIMER_CLOCK)
+
+    def schedule_frames(self, frames, callback, repeat=False):
+        return self.scheduler.schedule(frames, callback, repeat, FRAME_CLOCK)
+
+    def cancel_scheduled(self, handle):
+        self.scheduler.cancel(handle)
+
+    def submit_job(self, generator, name=None, on_complete=None):
+        # Generators submitted here are advanced step by step in the idle time between frames
+        return self.jobs.submit(generator, name, on_complete)
 
     def reset_delta(self):
         self.delta = self.get_system_time() - self.last_delta
@@ -183,48 +322,138 @@ class PyEngine:
     def wait_for_next_frame(self):
         self.set_processing_time()
 
+        if self.headless:
+            self.finish_headless_frame()
+            return
+
+        self.memory.begin_phase("idle")
+        idle_start = self.get_time()
+        self.jobs.start_frame()
         while self.get_time() < self.get_target_time():
-            # Check if the game has been exited
-            if self.is_exited():
-                self.quit()
-            self.window.update()
+            self.idle()
+        self.jobs.add_idle_time(max(self.get_time() - idle_start, 0))
+
+        self.finish_frame()
+
+    async def wait_for_next_frame_async(self):
+        self.set_processing_time()
+
+        if self.headless:
+            # Still yield once, so tasks on the event loop keep running between headless frames
+            await asyncio.sleep(0)
+            self.finish_headless_frame()
+            return
+
+        self.memory.begin_phase("idle")
+        idle_start = self.get_time()
+        self.jobs.start_frame()
+        while True:
+            self.idle()
+
+            # Sleep instead of spinning so tasks on the event loop get the rest of the frame
+            remaining = self.get_target_time() - self.get_time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(remaining / 1000)
+        self.jobs.add_idle_time(max(self.get_time() - idle_start, 0))
+
+        self.finish_frame()
+
+    def idle(self):
+        # Check if the game has been exited
+        if self.is_exited():
+            self.quit()
+        self.window.update()
 
-            self.interframe()
+        self.jobs.run(self.get_target_time())
+        self.interframe()
 
+    def finish_headless_frame(self):
+        # Nothing to wait for: give background jobs their steps and jump the virtual clock to the next frame
+        self.jobs.run_steps()
+        self.virtual_time = self.start_time + self.target_delta_time * (self.frame_count + 1)
+        self.finish_frame()
+
+    def finish_frame(self):
         self.frame_count += 1
         # Calculate the framerate
         self.add_to_average_ms_per_frame(self.get_delta_time())
         self.reset_delta()
 
+        self.metrics.update()
+        self.memory.end_frame()
+        self.resolution_controller.update()
+
+        if not self.startup.is_finished():
+            self.report_startup()
+
+        if self.farm_run is not None and self.frame_count >= self.farm_run.max_frames:
+            self.stop_running()
+
     def reset_timer(self):
         self.timer_reset_time = self.get_system_time()
 
-    def start(self):
-        print(f"Starting {self.window.get_title()}...")
+    def start(self, use_asyncio=False):
+        # Everything between the constructor and start() is the game's own setup
+        self.startup.mark("game setup")
+        if not self.headless:
+            print(f"Starting {self.window.get_title()}...")
+
+        # Only the display is needed to run, font and mixer are initialized on first use
+        self.core.display.init()
+        self.startup.mark("display init")
 
-        self.core.init()
-        self.console.clear()
         self.running = True
         self.reset_timer()
         self.reset_delta()
         self.reset()
 
         self.initialize_entities()
+        self.startup.mark("entities")
 
         self.window.initialize()
         self.screen.initialize()
+        self.startup.mark("window")
         self.console.initialize()
         self.commands.initialize()
+        self.startup.mark("console")
 
         self.start_time = self.get_system_time()
+        self.renderer.start()
 
-        self.run()
+        if self.farm_run is not None:
+            self.farm_run.schedule(self)
+
+        if use_asyncio:
+            asyncio.run(self.run_async())
+        else:
+            self.run()
 
     def quit(self):
         # Handle any closing events here
+        self.running = False
+        if self.finished:
+            return
+        self.finished = True
+
+        self.cancel_tasks()
+        self.metrics.stop()
+        self.memory.disable()
+        self.capture.stop()
+        self.renderer.stop()
         self.console.quit()
         self.core.display.quit()
-        exit()
+
+        # Headless engines return to whoever started them, such as a simulation farm worker
+        if not self.headless:
+            exit()
+
+    def report_startup(self):
+        self.startup.finish()
+        self.set_result("startup", self.startup.get_phases())
+        if not self.headless:
+            for line in self.startup.format():
+                self.console.send(line, source="startup")
 
     def pre_update(self):
         self.pre_processing_time = self.get_system_time()
@@ -235,13 +464,44 @@ class PyEngine:
         self.core.display.flip()
 
     def add_entity(self, entity):
+        previous = self.entities.get(entity.name)
+        if previous is not None and previous is not entity:
+            # An entity registered under the same name is replaced
+            previous.clear_wake_conditions()
+            self.update_tiers.forget(previous)
+            self.entity_index.remove(previous)
+
         self.entities[entity.name] = entity
+        self.update_tiers.add(entity)
+        self.entity_index.add(entity)
 
     def get_entity(self, name):
         return self.entities.get(name)
 
     def remove_entity(self, name):
-        self.entities.pop(name)
+        entity = self.entities.pop(name)
+        entity.clear_wake_conditions()
+        self.update_tiers.forget(entity)
+        self.entity_index.remove(entity)
+        self.messages.unsubscribe_all(entity)
+
+    def query(self, entity_type=None, tags=(), components=(), exclude_tags=()):
+        """
+        Returns a live view of the entities that are instances of entity_type, have all the given tags
+        and components, and none of exclude_tags. Views are cached and updated as entities change, so
+        calling this every frame with the same arguments costs a dict lookup.
+        """
+        if type(tags) is str:
+            tags = (tags,)
+        if type(exclude_tags) is str:
+            exclude_tags = (exclude_tags,)
+        if isinstance(components, type):
+            components = (components,)
+
+        required = [(TAG, tag) for tag in tags] + [(COMPONENT, component_type) for component_type in components]
+        if entity_type is not None:
+            required.append((TYPE, entity_type))
+        return self.entity_index.query(required, [(TAG, tag) for tag in exclude_tags])
 
     def initialize_entities(self):
         for entity in self.entities.items():
@@ -254,35 +514,111 @@ class PyEngine:
     def draw_entities(self):
         for entity in self.entities.items():
             if entity[1].is_visible():
-                entity[1].draw(self.screen.surface)
+                self.screen.add(entity[1])
 
     def update_entities(self):
-        for entity in self.entities.items():
-            if entity[1].is_visible():
-                entity[1].update(self.delta)
+        # Which entities run this frame depends on their update rate and whether they are asleep, not their visibility
+        self.update_tiers.update(self.delta)
+
+    def spawn(self, coroutine):
+        if self.loop is None:
+            coroutine.close()
+            raise RuntimeError("Coroutines can only be spawned when the engine is started with run_async().")
+
+        task = self.loop.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def spawn_threadsafe(self, coroutine):
+        # For coroutines created off the main thread, such as async console commands
+        if self.loop is None:
+            coroutine.close()
+            raise RuntimeError("Coroutines can only be spawned when the engine is started with run_async().")
+
+        return asyncio.run_coroutine_threadsafe(self._run_task(coroutine), self.loop)
+
+    async def _run_task(self, coroutine):
+        return await self.spawn(coroutine)
+
+    def _task_done(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.console.send(f"Task failed: {task.exception()}")
+
+    def get_task_count(self):
+        return len(self.tasks)
+
+    def cancel_tasks(self):
+        for task in list(self.tasks):
+            task.cancel()
+        self.tasks.clear()
 
     def stop_running(self):
         self.running = False
 
+    def run_frame(self):
+        # The memory phases only record anything while memory tracking is enabled
+        self.memory.begin_phase("events")
+        self.pre_update()
+
+        self.window.update()
+        # Scripts keep running while paused, so they can pause and resume the game themselves
+        self.scripts.update()
+        if not self.is_paused():
+            self.memory.begin_phase("update")
+            self.messages.dispatch()
+            self.scheduler.update()
+            self.update()
+
+            if self.snapshots.is_recording():
+                self.snapshots.capture()
+
+        self.memory.begin_phase("draw")
+        self.draw()
+        # The debug overlay is drawn with the game, before the frame is scaled to the render resolution
+        if self.is_debug_mode_enabled():
+            self.debug()
+
+        self.screen.resolve()
+        self.screen.post_process.apply()
+
+        self.memory.begin_phase("screen")
+        if self.capture.is_recording():
+            self.capture.capture()
+
+        if self.renderer.is_running():
+            # The render thread scales and flips this buffer while the next frame is drawn into the other one
+            self.renderer.submit()
+        else:
+            self.screen.draw()
+
+            self.memory.begin_phase("flip")
+            self.draw_frame()
+
     def run(self):
         try:
             while self.is_running():
-                self.pre_update()
-
-                self.window.update()
-                if not self.is_paused():
-                    self.update()
-
-                self.draw()
-
-                if self.is_debug_mode_enabled():
-                    self.debug()
+                self.run_frame()
+                self.wait_for_next_frame()
+        except Exception as e:
+            self.error = e
+            self.console.send("An error occurred while running the game.")
+            self.console.send(e)
+        except KeyboardInterrupt:
+            self.console.send("Keyboard interrupt detected. Quitting...")
 
-                self.screen.draw()
+        self.quit()
 
-                self.draw_frame()
-                self.wait_for_next_frame()
+    async def run_async(self):
+        # Same frame loop as run(), but frame pacing awaits so other tasks on the loop can run
+        self.loop = asyncio.get_running_loop()
+        try:
+            while self.is_running():
+                self.run_frame()
+                await self.wait_for_next_frame_async()
         except Exception as e:
+            self.error = e
             self.console.send("An error occurred while running the game.")
             self.console.send(e)
         except KeyboardInterrupt:
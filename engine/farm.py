@@ -0,0 +1,224 @@
+import multiprocessing
+import random
+from collections import deque
+from functools import partial
+from multiprocessing.connection import wait
+from time import perf_counter
+from engine.engine import PyEngine
+
+
+class FarmRun:
+    """
+    One simulation for the farm: the engine class (or any picklable factory returning a started or
+    startable engine), its keyword arguments, a seed, a frame limit and a script of (frame, command)
+    pairs executed through the console commands, e.g. (30, "press d") or (90, "release d").
+    """
+    def __init__(self, factory, seed=0, max_frames=600, commands=(), kwargs=None):
+        self.factory = factory
+        self.seed = seed
+        self.max_frames = max_frames
+        self.commands = tuple(commands)
+        self.kwargs = kwargs or {}
+
+    def schedule(self, engine):
+        for frame, command in self.commands:
+            engine.schedule_frames(frame, partial(engine.commands.execute, command))
+
+
+class RunResult:
+    __slots__ = ("index", "seed", "ok", "error", "frames", "wall_time", "results", "metrics")
+
+    def __init__(self, index, seed, ok=True, error=None, frames=0, wall_time=0.0, results=None, metrics=None):
+        self.index = index
+        self.seed = seed
+        self.ok = ok
+        self.error = error
+        self.frames = frames
+        self.wall_time = wall_time
+        self.results = results or {}
+        self.metrics = metrics or {}
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"failed: {self.error}"
+        return f"RunResult({self.index}, seed={self.seed}, frames={self.frames}, {status})"
+
+
+def execute_run(index, run):
+    random.seed(run.seed)
+    try:
+        import numpy
+        numpy.random.seed(run.seed % 2 ** 32)
+    except ImportError:
+        pass
+
+    PyEngine.farm_run = run
+    start = perf_counter()
+    try:
+        engine = run.factory(**run.kwargs)
+        # Engines like Game start themselves in their constructor, others are started here
+        if not engine.finished:
+            engine.start()
+    except BaseException as e:
+        return RunResult(index, run.seed, False, repr(e), wall_time=perf_counter() - start)
+    finally:
+        PyEngine.farm_run = None
+
+    wall_time = perf_counter() - start
+    return RunResult(
+        index, run.seed,
+        ok=engine.error is None,
+        error=repr(engine.error) if engine.error is not None else None,
+        frames=engine.get_frame_count(),
+        wall_time=wall_time,
+        results=engine.get_results(),
+        metrics={
+            "timer_time": engine.get_timer_time(),
+            "frames_per_second": engine.get_frame_count() / wall_time if wall_time > 0 else 0,
+            "commands_executed": engine.metrics.commands.value,
+            "entities": len(engine.entities)
+        }
+    )
+
+
+def worker_main(connection):
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+
+        connection.send(execute_run(*task))
+
+
+class FarmWorker:
+    def __init__(self, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+        self.task = None
+        self.started_at = 0
+
+    def assign(self, task):
+        self.task = task
+        self.started_at = perf_counter()
+        self.connection.send(task)
+
+    def is_busy(self):
+        return self.task is not None
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+class SimulationFarm:
+    """
+    Runs many headless engine instances across a pool of worker processes.
+    Each worker runs one simulation at a time; workers that crash or exceed the timeout are
+    replaced and their run is reported as failed.
+    """
+
+    #
+    # ===============================================================
+    # ======================== INITIALIZATION =======================
+    # ===============================================================
+    #
+
+    def __init__(self, workers=None, timeout=60):
+        self.worker_count = workers or multiprocessing.cpu_count()
+        self.timeout = timeout
+        self.context = multiprocessing.get_context()
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    #
+    # ===============================================================
+    # ======================== CLASS METHODS ========================
+    # ===============================================================
+    #
+
+    def run(self, runs, on_result=None):
+        runs = list(runs)
+        pending = deque(enumerate(runs))
+        results = [None] * len(runs)
+
+        while len(self.workers) < min(self.worker_count, len(runs)):
+            self.workers.append(FarmWorker(self.context))
+
+        for worker in self.workers:
+            if len(pending) > 0:
+                worker.assign(pending.popleft())
+
+        while any(worker.is_busy() for worker in self.workers):
+            busy = [worker for worker in self.workers if worker.is_busy()]
+            wait([worker.connection for worker in busy] + [worker.process.sentinel for worker in busy], timeout=0.1)
+
+            for worker in busy:
+                result = self.collect(worker)
+                if result is None:
+                    continue
+
+                results[result.index] = result
+                if on_result is not None:
+                    on_result(result)
+
+                if not worker.process.is_alive():
+                    self.workers[self.workers.index(worker)] = worker = FarmWorker(self.context)
+                if len(pending) > 0:
+                    worker.assign(pending.popleft())
+
+        return results
+
+    def collect(self, worker):
+        index, run = worker.task
+
+        if worker.connection.poll():
+            try:
+                result = worker.connection.recv()
+                worker.task = None
+                return result
+            except EOFError:
+                pass
+
+        if not worker.process.is_alive():
+            worker.task = None
+            worker.kill()
+            return RunResult(index, run.seed, False, f"worker crashed (exit code {worker.process.exitcode})")
+
+        if perf_counter() - worker.started_at > self.timeout:
+            worker.task = None
+            worker.kill()
+            return RunResult(index, run.seed, False, f"timed out after {self.timeout} seconds")
+
+        return None
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+        self.workers = []
@@ -53,8 +53,8 @@ class Game(PyEngine):
     def debug(self):
         # draw the framerate in the top left using pygame as self.core
         mouse_pos = self.inputs.get_mouse_pos()
-        mouse_pos_text = self.core.font.SysFont("Arial", 20).render(str(mouse_pos), True, (0, 0, 0))
-        fps = self.core.font.SysFont("Arial", 20).render(str(self.get_framerate()), True, (0, 0, 0))
+        mouse_pos_text = self.get_font("Arial", 20).render(str(mouse_pos), True, (0, 0, 0))
+        fps = self.get_font("Arial", 20).render(str(self.get_framerate()), True, (0, 0, 0))
 
         # draw red circle at mouse position
         self.core.draw.circle(self.screen.surface, (255, 0, 0), mouse_pos, 5)
@@ -2,6 +2,8 @@ from engine.elements.entity import Entity
 
 
 class Player(Entity):
+    STATE_FIELDS = Entity.STATE_FIELDS + (("x_speed", "d"), ("y_speed", "d"), ("on_ground", "?"))
+
     def __init__(self, engine):
         super().__init__(engine, "Player", 0, 0, 50, 50, 0, 0)
 
@@ -58,7 +60,7 @@ class Player(Entity):
             self.x_speed += self.VELOCITY * delta
         if self.engine.inputs.is_key_pressed("w") and self.on_ground:
             self.y_speed = -self.JUMP_VELOCITY
-            self.engine.console.send("Player jumped!")
+            self.engine.console.send("Player jumped!", source=self.name)
 
         self.x += self.x_speed * delta
         self.y += self.y_speed * delta